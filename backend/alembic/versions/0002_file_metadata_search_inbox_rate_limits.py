@@ -0,0 +1,130 @@
+"""file metadata, search, webhook inbox and rate limits
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 07:05:12.481316
+
+Schema added to the models since the baseline: keyset pagination indexes,
+project_files.size and content_hash, the file search table, the Stripe
+webhook inbox and the shared rate limit buckets.
+
+Databases stamped at 0001 may already hold the new tables and their
+indexes, because worker startup used to run ``create_all``, which creates
+missing tables but never alters existing ones. Each step is therefore
+skipped when what it creates is already there.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _has_index(table: str, index: str) -> bool:
+    return index in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _create_index(name: str, table: str, columns: list, **kw) -> None:
+    if not _has_index(table, name):
+        op.create_index(name, table, columns, **kw)
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    # Keyset pagination
+    _create_index('ix_projects_owner_id_id', 'projects', ['owner_id', 'id'], unique=False)
+    _create_index('ix_project_files_project_id_id', 'project_files', ['project_id', 'id'], unique=False)
+
+    # File size for the manifest, content hash for the blob store
+    with op.batch_alter_table('project_files', schema=None) as batch_op:
+        if not _has_column('project_files', 'size'):
+            batch_op.add_column(sa.Column('size', sa.Integer(), nullable=True))
+        if not _has_column('project_files', 'content_hash'):
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+    _create_index(op.f('ix_project_files_content_hash'), 'project_files', ['content_hash'], unique=False)
+
+    # File search
+    if not _has_table('project_file_search'):
+        op.create_table('project_file_search',
+        sa.Column('file_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('file_type', sa.String(), nullable=True),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['file_id'], ['project_files.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('file_id')
+        )
+    _create_index(op.f('ix_project_file_search_project_id'), 'project_file_search', ['project_id'], unique=False)
+    if is_postgres:
+        # Word and substring search indexes used by app.search.postgres
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        _create_index('ix_project_file_search_tsv', 'project_file_search', [sa.text("to_tsvector('simple', body)")], unique=False, postgresql_using='gin')
+        _create_index('ix_project_file_search_body_trgm', 'project_file_search', ['body'], unique=False, postgresql_using='gin', postgresql_ops={'body': 'gin_trgm_ops'})
+
+    # Stripe webhook inbox
+    if not _has_table('stripe_events'):
+        op.create_table('stripe_events',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('ordering_key', sa.String(), nullable=False),
+        sa.Column('stripe_created', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    _create_index('ix_stripe_events_status_next_attempt_at', 'stripe_events', ['status', 'next_attempt_at'], unique=False)
+    _create_index('ix_stripe_events_ordering_key_created', 'stripe_events', ['ordering_key', 'stripe_created'], unique=False)
+
+    # Shared rate limit buckets
+    if not _has_table('rate_limit_buckets'):
+        op.create_table('rate_limit_buckets',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('full_at', sa.Float(), nullable=False),
+        sa.Column('allowed', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+        )
+    _create_index('ix_rate_limit_buckets_full_at', 'rate_limit_buckets', ['full_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limit_buckets_full_at', table_name='rate_limit_buckets')
+    op.drop_table('rate_limit_buckets')
+    op.drop_index('ix_stripe_events_ordering_key_created', table_name='stripe_events')
+    op.drop_index('ix_stripe_events_status_next_attempt_at', table_name='stripe_events')
+    op.drop_table('stripe_events')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_project_file_search_body_trgm', table_name='project_file_search')
+        op.drop_index('ix_project_file_search_tsv', table_name='project_file_search')
+    op.drop_index(op.f('ix_project_file_search_project_id'), table_name='project_file_search')
+    op.drop_table('project_file_search')
+    with op.batch_alter_table('project_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_project_files_content_hash'))
+        batch_op.drop_index('ix_project_files_project_id_id')
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('size')
+    op.drop_index('ix_projects_owner_id_id', table_name='projects')
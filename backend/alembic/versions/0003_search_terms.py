@@ -0,0 +1,91 @@
+"""tokenized search terms
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 07:41:27.902114
+
+Adds project_file_search.terms, which holds the path and body split by
+app.search.base.tokenize, and moves the Postgres word index onto it. On
+Postgres, camelCase and snake_case identifiers then match the same queries
+as they do in the memory backend. Existing rows are backfilled here with
+a copy of the tokenizer as it stood at this revision, so replaying the
+migration builds the same terms whatever app.search.base later becomes.
+
+"""
+import re
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|[0-9]+')
+_CAMEL_PART = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+')
+
+search_table = sa.table(
+    'project_file_search',
+    sa.column('file_id', sa.Integer),
+    sa.column('path', sa.String),
+    sa.column('body', sa.Text),
+    sa.column('terms', sa.Text),
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in _IDENTIFIER.findall(text):
+        tokens.append(word.lower())
+        parts = [part.lower() for chunk in word.split('_') for part in _CAMEL_PART.findall(chunk)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def _document_terms(path: str, content: str) -> List[str]:
+    return _tokenize(path) + _tokenize(content)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Databases stamped at 0001 may have been built with this column by create_all
+    if 'terms' not in {c['name'] for c in sa.inspect(bind).get_columns('project_file_search')}:
+        with op.batch_alter_table('project_file_search', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('terms', sa.Text(), nullable=False, server_default=''))
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(search_table.c.file_id, search_table.c.path, search_table.c.body)
+            .where(search_table.c.file_id > last_id)
+            .order_by(search_table.c.file_id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for file_id, path, body in rows:
+            bind.execute(
+                search_table.update()
+                .where(search_table.c.file_id == file_id)
+                .values(terms=' '.join(_document_terms(path, body)))
+            )
+        last_id = rows[-1][0]
+
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_project_file_search_tsv', table_name='project_file_search')
+        op.create_index('ix_project_file_search_tsv', 'project_file_search', [sa.text("to_tsvector('simple', terms)")], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_project_file_search_tsv', table_name='project_file_search')
+        op.create_index('ix_project_file_search_tsv', 'project_file_search', [sa.text("to_tsvector('simple', body)")], unique=False, postgresql_using='gin')
+    with op.batch_alter_table('project_file_search', schema=None) as batch_op:
+        batch_op.drop_column('terms')
@@ -0,0 +1,71 @@
+"""unique file paths
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:12:40.518233
+
+Adds a unique index on project_files (project_id, path), which bulk sync
+upserts against. Before it existed, two concurrent syncs could both insert
+the same path. Duplicates already present keep their content: every copy
+but the oldest has ``~<id>`` appended to its path, so the owner can find
+and resolve them.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+files_table = sa.table(
+    'project_files',
+    sa.column('id', sa.Integer),
+    sa.column('project_id', sa.Integer),
+    sa.column('path', sa.String),
+)
+search_table = sa.table(
+    'project_file_search',
+    sa.column('file_id', sa.Integer),
+    sa.column('path', sa.String),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if 'uq_project_files_project_id_path' in {i['name'] for i in sa.inspect(bind).get_indexes('project_files')}:
+        return
+
+    duplicated = (
+        sa.select(files_table.c.project_id, files_table.c.path)
+        .group_by(files_table.c.project_id, files_table.c.path)
+        .having(sa.func.count() > 1)
+        .subquery()
+    )
+    rows = bind.execute(
+        sa.select(files_table.c.id, files_table.c.project_id, files_table.c.path)
+        .join(duplicated, sa.and_(
+            files_table.c.project_id == duplicated.c.project_id,
+            files_table.c.path == duplicated.c.path,
+        ))
+        .order_by(files_table.c.project_id, files_table.c.path, files_table.c.id)
+    ).all()
+    seen = set()
+    for file_id, project_id, path in rows:
+        if (project_id, path) not in seen:
+            seen.add((project_id, path))
+            continue
+        renamed = f'{path}~{file_id}'
+        bind.execute(files_table.update().where(files_table.c.id == file_id).values(path=renamed))
+        bind.execute(search_table.update().where(search_table.c.file_id == file_id).values(path=renamed))
+
+    op.create_index('uq_project_files_project_id_path', 'project_files', ['project_id', 'path'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_project_files_project_id_path', table_name='project_files')
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.core.compression import compressed_blob_cache
+from app.core.config import settings
+from app.core.database import async_engine, get_pool_stats
+from app.core.hashing import password_hasher
+from app.core.idempotency import idempotency_store
+from app.core.security import rejected_token_cache, token_cache
+from app.core.user_cache import user_cache
+from app.services.google_tokens import google_certs
+from app.services.stripe_gateway import stripe_gateway
+
+router = APIRouter()
+
+OK, DEGRADED, FAIL = "ok", "degraded", "fail"
+# Below this share of free connections the pool is reported as degraded
+POOL_LOW_HEADROOM = 0.1
+
+
+def overall_status(checks: Dict[str, Dict[str, Any]]) -> str:
+    statuses = {check["status"] for check in checks.values()}
+    if FAIL in statuses:
+        return FAIL
+    return DEGRADED if DEGRADED in statuses else OK
+
+
+class ReadinessProbe:
+    """
+    Checks whether this worker should receive traffic.
+
+    Only the database round trip decides readiness: it fails when the ping
+    errors or when it, pool checkout included, does not finish within
+    ``db_timeout``. A busy pool, the hashing executor and integrations can
+    only mark it degraded; a saturated pool still hands out connections as
+    requests finish, and pulling every busy worker out of rotation at once
+    would turn a load spike into an outage. Results are
+    cached for ``cache_seconds`` and concurrent probes share one check, so
+    probes cost at most one ``SELECT 1`` per interval per worker.
+    """
+
+    def __init__(self, cache_seconds: float, db_timeout: float, db_slow_ms: float):
+        self.cache_seconds = cache_seconds
+        self.db_timeout = db_timeout
+        self.db_slow_ms = db_slow_ms
+        self.draining = False
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _ping(self) -> None:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _check_database(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            # Covers the pool checkout too, which waits when the pool is exhausted
+            await asyncio.wait_for(self._ping(), self.db_timeout)
+        except asyncio.TimeoutError:
+            return {"status": FAIL, "error": f"no reply within {self.db_timeout:g}s"}
+        except Exception as e:
+            return {"status": FAIL, "error": f"{type(e).__name__}: {e}"}
+        latency_ms = (time.perf_counter() - start) * 1000
+        status = DEGRADED if latency_ms >= self.db_slow_ms else OK
+        return {"status": status, "latency_ms": round(latency_ms, 2)}
+
+    def _check_pool(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        check = {
+            "status": OK,
+            "timeouts": stats["timeouts"],
+            "checkout_wait_p99_ms": round(stats["checkout_wait_p99_ms"], 2),
+        }
+        if "size" not in stats:
+            return check
+        capacity = stats["size"] + stats["max_overflow"]
+        headroom = max(capacity - stats["checked_out"], 0)
+        check.update({"capacity": capacity, "checked_out": stats["checked_out"], "headroom": headroom})
+        if headroom < capacity * POOL_LOW_HEADROOM:
+            check["status"] = DEGRADED
+        return check
+
+    def _check_hasher(self) -> Dict[str, Any]:
+        stats = password_hasher.stats()
+        status = DEGRADED if stats["saturation"] >= 1 else OK
+        return {"status": status, **{key: stats[key] for key in ("running", "queued", "rejected", "saturation")}}
+
+    def _check_caches(self) -> Dict[str, Any]:
+        caches = {
+            "user": user_cache.stats(),
+            "token": token_cache.stats(),
+            "rejected_token": rejected_token_cache.stats(),
+            "compressed_blob": compressed_blob_cache.stats(),
+            "idempotency": idempotency_store.stats(),
+        }
+        return {
+            "status": OK,
+            **{
+                name: {"size": stats["size"], "max_size": stats["max_size"],
+                       "hit_ratio": round(stats["hit_ratio"], 4)}
+                for name, stats in caches.items()
+            },
+        }
+
+    def _check_integrations(self) -> Dict[str, Any]:
+        circuit = stripe_gateway.stats()["circuit"]
+        certs = google_certs.stats()
+        status = DEGRADED if circuit == "open" or not certs["keys"] else OK
+        return {"status": status, "stripe_circuit": circuit, "google_certs_fresh": certs["fresh"]}
+
+    async def _run_checks(self) -> Dict[str, Any]:
+        # Read the pool before the ping takes a connection of its own
+        pool = self._check_pool(get_pool_stats()["async"])
+        checks = {
+            "database": await self._check_database(),
+            "pool": pool,
+            "password_hasher": self._check_hasher(),
+            "caches": self._check_caches(),
+            "integrations": self._check_integrations(),
+        }
+        return {"status": overall_status(checks), "checks": checks}
+
+    async def check(self) -> Dict[str, Any]:
+        """Latest readiness report, re-running the checks once it is stale"""
+        if self.draining:
+            return {"status": FAIL, "checks": {}, "detail": "shutting down"}
+        if self._result is None or time.monotonic() - self._checked_at >= self.cache_seconds:
+            async with self._lock:
+                if self._result is None or time.monotonic() - self._checked_at >= self.cache_seconds:
+                    self._result = await self._run_checks()
+                    self._checked_at = time.monotonic()
+        return {**self._result, "age_seconds": round(time.monotonic() - self._checked_at, 3)}
+
+
+readiness_probe = ReadinessProbe(
+    cache_seconds=settings.HEALTH_CACHE_SECONDS,
+    db_timeout=settings.HEALTH_DB_TIMEOUT_SECONDS,
+    db_slow_ms=settings.HEALTH_DB_SLOW_MS,
+)
+
+
+@router.get("/health")
+@router.get("/health/live")
+async def liveness() -> Dict[str, str]:
+    """
+    The process is up and serving; never touches a dependency, so a slow
+    database does not get healthy workers restarted.
+    """
+    return {"status": "healthy"}
+
+
+@router.get("/health/ready")
+async def readiness() -> JSONResponse:
+    """
+    Whether this worker should receive traffic: 503 when the database is
+    unreachable, a connection cannot be checked out in time or the worker
+    is shutting down. A saturated pool is reported as degraded.
+    """
+    report = await readiness_probe.check()
+    return JSONResponse(report, status_code=503 if report["status"] == FAIL else 200)
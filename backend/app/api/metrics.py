@@ -0,0 +1,132 @@
+import secrets
+from typing import Iterable, List
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from app import ratelimit
+from app.core.compression import compressed_blob_cache
+from app.core.config import settings
+from app.core.database import get_pool_stats
+from app.core.hashing import password_hasher
+from app.core.idempotency import idempotency_store
+from app.core.metrics import CONTENT_TYPE, CollectedMetric, registry
+from app.core.query_tracking import query_totals
+from app.core.security import rejected_token_cache, token_cache
+from app.core.user_cache import user_cache
+from app.services.google_tokens import google_certs
+from app.services.stripe_events import stripe_event_worker
+from app.services.stripe_gateway import stripe_gateway
+
+router = APIRouter()
+
+
+def _pool_metrics() -> Iterable[CollectedMetric]:
+    pools = get_pool_stats()
+    gauges = {
+        "size": ("db_pool_size", "Configured pool size"),
+        "checked_out": ("db_pool_checked_out", "Connections currently checked out"),
+        "overflow": ("db_pool_overflow", "Overflow connections currently open"),
+    }
+    for key, (name, help) in gauges.items():
+        yield CollectedMetric(name, "gauge", help, [
+            ({"engine": engine}, stats[key]) for engine, stats in pools.items() if key in stats
+        ])
+    yield CollectedMetric("db_pool_checkouts_total", "counter", "Connection checkouts", [
+        ({"engine": engine}, stats["checkouts"]) for engine, stats in pools.items()
+    ])
+    yield CollectedMetric("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting", [
+        ({"engine": engine}, stats["timeouts"]) for engine, stats in pools.items()
+    ])
+    yield CollectedMetric("db_pool_checkout_wait_p99_seconds", "gauge", "p99 checkout wait over recent checkouts", [
+        ({"engine": engine}, stats["checkout_wait_p99_ms"] / 1000) for engine, stats in pools.items()
+    ])
+    totals = query_totals.stats()
+    yield CollectedMetric("db_queries_total", "counter", "SQL statements executed", [({}, totals["count"])])
+    yield CollectedMetric("db_query_seconds_total", "counter", "Time spent executing SQL", [({}, totals["seconds"])])
+    yield CollectedMetric("db_query_errors_total", "counter", "SQL statements that raised", [({}, totals["errors"])])
+    yield CollectedMetric("db_slow_queries_total", "counter", "SQL statements over QUERY_SLOW_MS", [({}, totals["slow"])])
+    yield CollectedMetric(
+        "db_repeated_statements_total", "counter", "Statements flagged as possible N+1, once per request",
+        [({}, totals["repeated"])],
+    )
+    yield CollectedMetric(
+        "db_query_budget_exceeded_total", "counter", "Requests over their SQL statement budget",
+        [({}, totals["over_budget"])],
+    )
+
+
+def _hasher_metrics() -> Iterable[CollectedMetric]:
+    stats = password_hasher.stats()
+    yield CollectedMetric("password_hash_running", "gauge", "bcrypt jobs running", [({}, stats["running"])])
+    yield CollectedMetric("password_hash_queued", "gauge", "bcrypt jobs waiting for a worker", [({}, stats["queued"])])
+    yield CollectedMetric("password_hash_completed_total", "counter", "bcrypt jobs completed", [({}, stats["completed"])])
+    yield CollectedMetric(
+        "password_hash_rejected_total", "counter", "bcrypt jobs rejected as overloaded", [({}, stats["rejected"])]
+    )
+
+
+def _cache_metrics() -> Iterable[CollectedMetric]:
+    caches = {
+        "user": user_cache.stats(),
+        "token": token_cache.stats(),
+        "rejected_token": rejected_token_cache.stats(),
+        "compressed_blob": compressed_blob_cache.stats(),
+        "idempotency": idempotency_store.stats(),
+    }
+    for key, name, type, help in (
+        ("size", "cache_entries", "gauge", "Entries currently cached"),
+        ("hits", "cache_hits_total", "counter", "Cache lookups that hit"),
+        ("misses", "cache_misses_total", "counter", "Cache lookups that missed"),
+        ("evictions", "cache_evictions_total", "counter", "Entries evicted to stay under max size"),
+    ):
+        yield CollectedMetric(name, type, help, [({"cache": cache}, stats[key]) for cache, stats in caches.items()])
+
+
+def _integration_metrics() -> Iterable[CollectedMetric]:
+    gateway = stripe_gateway.stats()
+    yield CollectedMetric("stripe_circuit_state", "gauge", "Stripe circuit breaker state", [
+        ({"state": state}, 1 if gateway["circuit"] == state else 0) for state in ("closed", "open", "half_open")
+    ])
+    yield CollectedMetric("stripe_retries_total", "counter", "Stripe attempts retried", [({}, gateway["retries"])])
+    yield CollectedMetric(
+        "stripe_rejected_total", "counter", "Stripe calls refused by the open circuit", [({}, gateway["rejected"])]
+    )
+    worker = stripe_event_worker.stats()
+    yield CollectedMetric(
+        "stripe_webhook_events_in_flight", "gauge", "Webhook events being applied", [({}, worker["in_flight"])]
+    )
+    yield CollectedMetric("stripe_webhook_events_total", "counter", "Webhook event attempts by outcome", [
+        ({"outcome": outcome}, worker[outcome]) for outcome in ("processed", "retried", "failed")
+    ])
+    certs = google_certs.stats()
+    yield CollectedMetric("google_certs_fresh", "gauge", "Whether Google signing keys are within max-age", [
+        ({}, 1 if certs["fresh"] else 0)
+    ])
+    yield CollectedMetric("google_certs_fetches_total", "counter", "Google certs fetches by outcome", [
+        ({"outcome": "ok"}, certs["fetches"]), ({"outcome": "error"}, certs["failures"])
+    ])
+    if ratelimit.rate_limiter is not None:
+        limits = ratelimit.rate_limiter.stats()
+        yield CollectedMetric("rate_limit_decisions_total", "counter", "Rate limiter decisions", [
+            ({"outcome": outcome}, limits.get(outcome, 0)) for outcome in ("allowed", "limited")
+        ])
+
+
+def collect_runtime_metrics() -> List[CollectedMetric]:
+    return [*_pool_metrics(), *_hasher_metrics(), *_cache_metrics(), *_integration_metrics()]
+
+
+registry.add_collector(collect_runtime_metrics)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request) -> Response:
+    """
+    Prometheus text-format metrics for this worker.
+    """
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not secrets.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,29 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
+from app.core.hashing import PasswordHasherOverloaded
+from app.ratelimit.dependencies import limit_by_ip, limit_by_user
 from app.services.auth_service import AuthService
 from app.schemas.auth import UserLogin, UserRegister, GoogleOAuthRequest, Token, UserResponse, AuthResponse
 
 router = APIRouter()
 security = HTTPBearer()
 
+# Per-IP limit on the unauthenticated, bcrypt-heavy routes
+auth_rate_limit = limit_by_ip("auth")
 
-@router.post("/register", response_model=AuthResponse)
+
+@router.post("/register", response_model=AuthResponse, dependencies=[Depends(auth_rate_limit)])
 async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
     try:
         auth_service = AuthService(db)
-        token = auth_service.register_user(user_data)
+        token = await auth_service.register_user(user_data)
         
-        user = auth_service.get_user_by_email(user_data.email)
+        user = await auth_service.get_user_by_email(user_data.email)
         return AuthResponse(
             user=UserResponse.from_orm(user),
             token=token
         )
+    except PasswordHasherOverloaded:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -31,14 +38,14 @@ async def register(
         )
 
 
-@router.post("/login", response_model=AuthResponse)
+@router.post("/login", response_model=AuthResponse, dependencies=[Depends(auth_rate_limit)])
 async def login(
     user_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login a user"""
     auth_service = AuthService(db)
-    token = auth_service.login_user(user_data)
+    token = await auth_service.login_user(user_data)
     
     if not token:
         raise HTTPException(
@@ -47,21 +54,21 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = auth_service.get_user_by_email(user_data.email)
+    user = await auth_service.get_user_by_email(user_data.email)
     return AuthResponse(
         user=UserResponse.from_orm(user),
         token=token
     )
 
 
-@router.post("/google", response_model=AuthResponse)
+@router.post("/google", response_model=AuthResponse, dependencies=[Depends(auth_rate_limit)])
 async def google_oauth(
     oauth_data: GoogleOAuthRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Google OAuth login/registration"""
     auth_service = AuthService(db)
-    token = auth_service.google_oauth_login(oauth_data)
+    token = await auth_service.google_oauth_login(oauth_data)
     
     if not token:
         raise HTTPException(
@@ -70,7 +77,7 @@ async def google_oauth(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = auth_service.get_user_by_email(token.email)
+    user = await auth_service.get_user_by_email(token.email)
     return AuthResponse(
         user=UserResponse.from_orm(user),
         token=token
@@ -80,11 +87,11 @@ async def google_oauth(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user information"""
     auth_service = AuthService(db)
-    user = auth_service.get_current_user(credentials.credentials)
+    user = await auth_service.get_current_user(credentials.credentials)
     
     if not user:
         raise HTTPException(
@@ -98,11 +105,11 @@ async def get_current_user(
 
 async def get_current_active_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current active user"""
     auth_service = AuthService(db)
-    user = auth_service.get_current_user(credentials.credentials)
+    user = await auth_service.get_current_user(credentials.credentials)
     
     if not user:
         raise HTTPException(
@@ -120,9 +127,14 @@ async def get_current_active_user(
     return user
 
 
+# Per-user limits on routes that write or call out to Stripe
+write_rate_limit = limit_by_user("write", get_current_active_user)
+payments_rate_limit = limit_by_user("payments", get_current_active_user)
+
+
 async def get_current_active_superuser(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current active superuser"""
     user = await get_current_active_user(credentials, db)
@@ -139,11 +151,11 @@ async def get_current_active_superuser(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token"""
     auth_service = AuthService(db)
-    user = auth_service.get_current_user(credentials.credentials)
+    user = await auth_service.get_current_user(credentials.credentials)
     
     if not user:
         raise HTTPException(
@@ -1,21 +1,28 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 import stripe
 
 from app.core.config import settings
-from app.core.database import get_db, SessionLocal
+from app.core.database import get_db
 from app.models.user import User
-from app.api.v1.endpoints.auth import get_current_active_user
-
-# Configure Stripe
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from app.api.v1.endpoints.auth import get_current_active_user, payments_rate_limit
+from app.services.stripe_events import record_event, stripe_event_worker
+from app.services.stripe_gateway import StripeGatewayError, StripeUnavailable, stripe_gateway
 
 router = APIRouter()
 
 
+def stripe_unavailable(e: StripeUnavailable) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Payment provider is temporarily unavailable, please retry shortly",
+        headers={"Retry-After": str(int(e.retry_after + 0.5))},
+    )
+
+
 @router.get("/pricing")
-def get_pricing_plans():
+async def get_pricing_plans():
     """
     Get available pricing plans.
     """
@@ -70,15 +77,19 @@ def get_pricing_plans():
     return {"plans": plans}
 
 
-@router.post("/create-checkout-session")
-def create_checkout_session(
+@router.post("/create-checkout-session", dependencies=[Depends(payments_rate_limit)])
+async def create_checkout_session(
     *,
     plan_id: str,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create Stripe checkout session for subscription.
+
+    Stripe calls carry their own idempotency keys, so a retry handled by
+    another worker reuses the customer and session Stripe already created.
     """
     if plan_id == "free":
         raise HTTPException(status_code=400, detail="Cannot subscribe to free plan")
@@ -96,15 +107,17 @@ def create_checkout_session(
     try:
         # Create or get Stripe customer
         if not current_user.stripe_customer_id:
-            customer = stripe.Customer.create(
+            customer = await stripe_gateway.create_customer(
                 email=current_user.email,
-                metadata={"user_id": current_user.id}
+                metadata={"user_id": current_user.id},
+                # One customer per user, however many checkouts race
+                idempotency_key=f"customer-create-{current_user.id}",
             )
-            current_user.stripe_customer_id = customer.id
-            db.commit()
+            current_user.stripe_customer_id = customer["id"]
+            await db.commit()
         
         # Create checkout session
-        checkout_session = stripe.checkout.Session.create(
+        checkout_session = await stripe_gateway.create_checkout_session(
             customer=current_user.stripe_customer_id,
             payment_method_types=["card"],
             line_items=[
@@ -119,19 +132,28 @@ def create_checkout_session(
             metadata={
                 "user_id": current_user.id,
                 "plan_id": plan_id
-            }
+            },
+            idempotency_key=(
+                f"checkout-{current_user.id}-{plan_id}-{idempotency_key}" if idempotency_key else None
+            ),
         )
         
-        return {"checkout_url": checkout_session.url}
+        return {"checkout_url": checkout_session["url"]}
         
-    except stripe.error.StripeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    except StripeUnavailable as e:
+        raise stripe_unavailable(e)
+    except StripeGatewayError as e:
+        raise HTTPException(status_code=400, detail=e.message)
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Handle Stripe webhooks for subscription events.
+    Receive Stripe webhooks for subscription events.
+
+    Verified events are stored in the inbox and applied by the background
+    worker, so this only costs one insert. Redeliveries of an event already
+    recorded are acknowledged without being stored again.
     """
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
@@ -145,77 +167,18 @@ async def stripe_webhook(request: Request):
     except stripe.error.SignatureVerificationError as e:
         raise HTTPException(status_code=400, detail="Invalid signature")
     
-    # Handle the event
-    if event["type"] == "checkout.session.completed":
-        session = event["data"]["object"]
-        handle_checkout_completed(session)
-    elif event["type"] == "customer.subscription.updated":
-        subscription = event["data"]["object"]
-        handle_subscription_updated(subscription)
-    elif event["type"] == "customer.subscription.deleted":
-        subscription = event["data"]["object"]
-        handle_subscription_deleted(subscription)
+    # Any other database error surfaces as a 500, so Stripe redelivers
+    if not await record_event(db, event, payload):
+        return {"status": "duplicate"}
+    stripe_event_worker.notify()
     
     return {"status": "success"}
 
 
-def handle_checkout_completed(session):
-    """
-    Handle successful checkout completion.
-    """
-    db = SessionLocal()
-    try:
-        user_id = session["metadata"]["user_id"]
-        plan_id = session["metadata"]["plan_id"]
-        
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            user.subscription_tier = plan_id
-            user.subscription_status = "active"
-            user.stripe_subscription_id = session["subscription"]
-            db.commit()
-    finally:
-        db.close()
-
-
-def handle_subscription_updated(subscription):
-    """
-    Handle subscription updates.
-    """
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(
-            User.stripe_subscription_id == subscription["id"]
-        ).first()
-        if user:
-            user.subscription_status = subscription["status"]
-            db.commit()
-    finally:
-        db.close()
-
-
-def handle_subscription_deleted(subscription):
-    """
-    Handle subscription cancellation.
-    """
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(
-            User.stripe_subscription_id == subscription["id"]
-        ).first()
-        if user:
-            user.subscription_tier = "free"
-            user.subscription_status = "canceled"
-            user.stripe_subscription_id = None
-            db.commit()
-    finally:
-        db.close()
-
-
-@router.post("/cancel-subscription")
-def cancel_subscription(
+@router.post("/cancel-subscription", dependencies=[Depends(payments_rate_limit)])
+async def cancel_subscription(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Cancel current subscription.
@@ -224,23 +187,24 @@ def cancel_subscription(
         raise HTTPException(status_code=400, detail="No active subscription")
     
     try:
-        subscription = stripe.Subscription.retrieve(
-            current_user.stripe_subscription_id
+        await stripe_gateway.update_subscription(
+            current_user.stripe_subscription_id,
+            cancel_at_period_end=True,
         )
-        subscription.cancel_at_period_end = True
-        subscription.save()
         
         current_user.subscription_status = "canceled"
-        db.commit()
+        await db.commit()
         
         return {"message": "Subscription will be canceled at the end of the billing period"}
         
-    except stripe.error.StripeError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    except StripeUnavailable as e:
+        raise stripe_unavailable(e)
+    except StripeGatewayError as e:
+        raise HTTPException(status_code=400, detail=e.message)
 
 
 @router.get("/subscription-status")
-def get_subscription_status(
+async def get_subscription_status(
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -1,80 +1,145 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import mimetypes
+import re
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.compression import choose_codec, compressed_blob_cache, response_codecs
+from app.core.conditional import is_not_modified, make_etag, not_modified, row_values, set_validators
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.responses import model_response
+from app.crud import crud_project
+from app.models.project import Project
 from app.models.user import User
-from app.models.project import Project, ProjectFile
 from app.schemas.project import (
     Project as ProjectSchema,
+    ProjectArchiveImportResult,
     ProjectCreate,
     ProjectUpdate,
     ProjectWithFiles,
     ProjectFile as ProjectFileSchema,
+    ProjectFileBatchRead,
+    ProjectFileBulkSync,
+    ProjectFileBulkSyncResponse,
     ProjectFileCreate,
+    ProjectFileManifestEntry,
+    ProjectFilePatch,
     ProjectFileUpdate
 )
-from app.api.v1.endpoints.auth import get_current_active_user
+from app.services.file_patch import PatchError, apply_line_patch
+from app.services.project_archive import (
+    ARCHIVE_FORMATS,
+    ArchiveError,
+    import_project_archive,
+    stream_project_archive
+)
+from app.storage import content_digest
+from app.api.v1.endpoints.auth import get_current_active_user, write_rate_limit
 
 router = APIRouter()
 
+# Upper bound on files returned by one batch content read
+MAX_FILE_BATCH_SIZE = 100
+# Upper bound on files touched by one bulk sync
+MAX_FILE_BULK_SIZE = 1000
+PATH_TAKEN_DETAIL = "A file with this path already exists in the project"
+
+
+def _project_etag(project: Project, versions: List[tuple]) -> str:
+    """ETag of a project read from its row and file versions"""
+    return make_etag(row_values(project), versions)
+
 
 @router.get("/", response_model=List[ProjectSchema])
-def read_projects(
-    db: Session = Depends(get_db),
+async def read_projects(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve projects for current user.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to page in
+    constant time; ``skip`` is ignored when a cursor is given. Responds 304
+    when ``If-None-Match`` shows the page unchanged. There is no
+    Last-Modified: deleting a project changes the page without advancing any
+    remaining row's timestamp.
     """
-    projects = db.query(Project).filter(Project.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return projects
+    after_id = decode_cursor(cursor) if cursor else None
+    projects = await crud_project.get_multi_by_owner(
+        db, owner_id=current_user.id, skip=skip, limit=limit, after_id=after_id
+    )
+    etag = make_etag([row_values(project) for project in projects])
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_next_cursor(request, response, projects, limit)
+    set_validators(response, etag)
+    return model_response(List[ProjectSchema], projects, response)
 
 
-@router.post("/", response_model=ProjectSchema)
-def create_project(
+@router.post("/", response_model=ProjectSchema, dependencies=[Depends(write_rate_limit)])
+async def create_project(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_in: ProjectCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new project.
     """
-    project = Project(
-        **project_in.dict(),
-        owner_id=current_user.id
-    )
-    db.add(project)
-    db.commit()
-    db.refresh(project)
+    project = await crud_project.create(db, obj_in=project_in.dict(), owner_id=current_user.id)
     return project
 
 
 @router.get("/{project_id}", response_model=ProjectWithFiles)
-def read_project(
+async def read_project(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get project by ID.
+
+    The ETag covers the project row and each file's metadata and content
+    hash, so a conditional request is answered with 304 from one metadata
+    query, before any file content is read. Like the project list it has no
+    Last-Modified, which deleting a file would not advance.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id and not project.is_public:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return project
+    
+    versions = await crud_project.get_file_versions(db, project_id=project_id)
+    etag = _project_etag(project, versions)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    project = await crud_project.get_with_files(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    # Tag what is actually sent, in case files changed between the two reads
+    versions = sorted(crud_project.file_version(f) for f in project.files)
+    set_validators(response, _project_etag(project, versions))
+    return model_response(ProjectWithFiles, project, response)
 
 
-@router.put("/{project_id}", response_model=ProjectSchema)
-def update_project(
+@router.put("/{project_id}", response_model=ProjectSchema, dependencies=[Depends(write_rate_limit)])
+async def update_project(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     project_in: ProjectUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -82,47 +147,222 @@ def update_project(
     """
     Update project.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    for field, value in project_in.dict(exclude_unset=True).items():
-        setattr(project, field, value)
-    
-    db.add(project)
-    db.commit()
-    db.refresh(project)
+    project = await crud_project.update(
+        db, db_obj=project, obj_in=project_in.dict(exclude_unset=True)
+    )
     return project
 
 
-@router.delete("/{project_id}")
-def delete_project(
+@router.delete("/{project_id}", dependencies=[Depends(write_rate_limit)])
+async def delete_project(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete project.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    db.delete(project)
-    db.commit()
+    await crud_project.remove(db, db_obj=project)
     return {"message": "Project deleted successfully"}
 
 
+@router.get("/{project_id}/export")
+async def export_project(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    format: str = Query("zip", pattern=r"^(zip|tar\.gz)$"),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Download all project files as a zip or tar.gz archive.
+
+    The archive is streamed as it is built, so large projects start
+    downloading immediately and are never held in memory.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not project.is_public:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    media_type, extension = ARCHIVE_FORMATS[format]
+    filename = re.sub(r"[^A-Za-z0-9._-]+", "_", project.name).strip("_") or f"project-{project_id}"
+    return StreamingResponse(
+        stream_project_archive(project_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+
+@router.post(
+    "/{project_id}/import",
+    response_model=ProjectArchiveImportResult,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def import_project(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    archive: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Import files from a zip or tar(.gz) archive, upserting them by path.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    try:
+        return await import_project_archive(db, project_id, archive.file)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # Project Files endpoints
-@router.post("/{project_id}/files", response_model=ProjectFileSchema)
-def create_project_file(
+@router.get("/{project_id}/files", response_model=List[ProjectFileManifestEntry])
+async def read_project_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    List file metadata for a project without loading file contents.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not project.is_public:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    files = await crud_project.get_manifest(db, project_id=project_id)
+    return model_response(List[ProjectFileManifestEntry], files)
+
+
+@router.get("/{project_id}/files/{file_id}", response_model=ProjectFileSchema)
+async def read_project_file(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    file_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a single project file including its content.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not project.is_public:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    file_obj = await crud_project.get_file(db, project_id=project_id, file_id=file_id)
+    if not file_obj:
+        raise HTTPException(status_code=404, detail="File not found")
+    return file_obj
+
+
+@router.get("/{project_id}/files/{file_id}/raw")
+async def download_project_file(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    file_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Download a file's body as-is.
+
+    A body never changes for a given content hash, so the hash is the ETag
+    and compressed copies are cached under it: repeat downloads are served
+    without reading the file or compressing it again.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not project.is_public:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    file_obj = await crud_project.get_file_metadata(db, project_id=project_id, file_id=file_id)
+    if not file_obj:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    digest = file_obj.content_hash
+    etag = f'"{digest}"' if digest else None
+    if etag and is_not_modified(request, etag):
+        return not_modified(etag)
+    
+    # Starlette adds the utf-8 charset to text/* types
+    media_type = mimetypes.guess_type(file_obj.path)[0] or "text/plain"
+    headers = {"Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    
+    codec = None
+    if settings.COMPRESSION_ENABLED and digest and (file_obj.size or 0) >= settings.COMPRESSION_MIN_SIZE:
+        codec = choose_codec(request.headers.get("accept-encoding", ""), response_codecs)
+    if codec is not None:
+        body = compressed_blob_cache.get(digest, codec.name)
+        if body is None:
+            content = await crud_project.read_content(db, file_obj=file_obj)
+            body = await compressed_blob_cache.store(digest, content.encode("utf-8"), codec)
+        headers.update({"ETag": f"W/{etag}", "Content-Encoding": codec.name})
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    content = await crud_project.read_content(db, file_obj=file_obj)
+    if etag:
+        headers["ETag"] = etag
+    return Response(content=content.encode("utf-8"), media_type=media_type, headers=headers)
+
+
+@router.post("/{project_id}/files/batch-read", response_model=List[ProjectFileSchema])
+async def read_project_files_batch(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    batch_in: ProjectFileBatchRead,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get several project files including their contents in one request.
+    """
+    if len(batch_in.file_ids) > MAX_FILE_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_FILE_BATCH_SIZE} files can be read per batch"
+        )
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not project.is_public:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    files = await crud_project.get_files(db, project_id=project_id, file_ids=batch_in.file_ids)
+    return model_response(List[ProjectFileSchema], files)
+
+
+@router.post(
+    "/{project_id}/files",
+    response_model=ProjectFileSchema,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def create_project_file(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     file_in: ProjectFileCreate,
     current_user: User = Depends(get_current_active_user),
@@ -130,26 +370,71 @@ def create_project_file(
     """
     Create new file in project.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    file_obj = ProjectFile(
-        **file_in.dict(),
-        project_id=project_id
-    )
-    db.add(file_obj)
-    db.commit()
-    db.refresh(file_obj)
+    try:
+        file_obj = await crud_project.create_file(
+            db, obj_in=file_in.dict(exclude={"project_id"}), project_id=project_id
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=PATH_TAKEN_DETAIL)
     return file_obj
 
 
-@router.put("/{project_id}/files/{file_id}", response_model=ProjectFileSchema)
-def update_project_file(
+@router.post(
+    "/{project_id}/files/bulk",
+    response_model=ProjectFileBulkSyncResponse,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def bulk_sync_project_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    sync_in: ProjectFileBulkSync,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Create, update and delete many files by path in a single transaction.
+    """
+    if len(sync_in.upserts) + len(sync_in.deletes) > MAX_FILE_BULK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_FILE_BULK_SIZE} files can be synced per request"
+        )
+    upsert_paths = [item.path for item in sync_in.upserts]
+    if len(set(upsert_paths)) != len(upsert_paths) or len(set(sync_in.deletes)) != len(sync_in.deletes):
+        raise HTTPException(status_code=400, detail="Each path may appear only once")
+    if set(upsert_paths) & set(sync_in.deletes):
+        raise HTTPException(status_code=400, detail="A path cannot be both upserted and deleted")
+    
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    results = await crud_project.bulk_sync_files(
+        db,
+        project_id=project_id,
+        upserts=[item.dict(exclude_unset=True) for item in sync_in.upserts],
+        delete_paths=sync_in.deletes,
+    )
+    return {"results": results}
+
+
+@router.put(
+    "/{project_id}/files/{file_id}",
+    response_model=ProjectFileSchema,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def update_project_file(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     file_id: int,
     file_in: ProjectFileUpdate,
@@ -158,32 +443,89 @@ def update_project_file(
     """
     Update project file.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    file_obj = db.query(ProjectFile).filter(
-        ProjectFile.id == file_id,
-        ProjectFile.project_id == project_id
-    ).first()
+    file_obj = await crud_project.get_file(db, project_id=project_id, file_id=file_id)
     if not file_obj:
         raise HTTPException(status_code=404, detail="File not found")
     
-    for field, value in file_in.dict(exclude_unset=True).items():
-        setattr(file_obj, field, value)
+    try:
+        file_obj = await crud_project.update_file(
+            db, db_obj=file_obj, obj_in=file_in.dict(exclude_unset=True)
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=PATH_TAKEN_DETAIL)
+    return file_obj
+
+
+@router.patch(
+    "/{project_id}/files/{file_id}",
+    response_model=ProjectFileManifestEntry,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def patch_project_file(
+    *,
+    db: AsyncSession = Depends(get_db),
+    project_id: int,
+    file_id: int,
+    patch_in: ProjectFilePatch,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Apply a line-based diff to a project file.
+
+    The patch must name the content hash it was computed against; if the
+    file has changed since, 409 is returned with the current hash so the
+    client can rebase. Responds with the new metadata (including hash)
+    rather than echoing the whole file back.
+    """
+    project = await crud_project.get(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    file_obj = await crud_project.get_file(db, project_id=project_id, file_id=file_id)
+    if not file_obj:
+        raise HTTPException(status_code=404, detail="File not found")
     
-    db.add(file_obj)
-    db.commit()
-    db.refresh(file_obj)
+    base_content = file_obj.content or ""
+    stored_hash = file_obj.content_hash
+    current_hash = stored_hash or content_digest(base_content.encode("utf-8"))
+    if patch_in.base_hash != current_hash:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "File changed since base version", "current_hash": current_hash}
+        )
+    
+    try:
+        new_content = apply_line_patch(base_content, patch_in.hunks)
+    except PatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    if patch_in.result_hash and patch_in.result_hash != content_digest(new_content.encode("utf-8")):
+        raise HTTPException(status_code=422, detail="Patched content does not match result_hash")
+    
+    written = await crud_project.update_file_content_if_unchanged(
+        db, db_obj=file_obj, base_hash=stored_hash, content=new_content
+    )
+    if not written:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "File changed while applying patch"}
+        )
     return file_obj
 
 
-@router.delete("/{project_id}/files/{file_id}")
-def delete_project_file(
+@router.delete("/{project_id}/files/{file_id}", dependencies=[Depends(write_rate_limit)])
+async def delete_project_file(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     project_id: int,
     file_id: int,
     current_user: User = Depends(get_current_active_user),
@@ -191,19 +533,15 @@ def delete_project_file(
     """
     Delete project file.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await crud_project.get(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    file_obj = db.query(ProjectFile).filter(
-        ProjectFile.id == file_id,
-        ProjectFile.project_id == project_id
-    ).first()
+    file_obj = await crud_project.get_file(db, project_id=project_id, file_id=file_id)
     if not file_obj:
         raise HTTPException(status_code=404, detail="File not found")
     
-    db.delete(file_obj)
-    db.commit()
+    await crud_project.remove_file(db, db_obj=file_obj)
     return {"message": "File deleted successfully"} 
\ No newline at end of file
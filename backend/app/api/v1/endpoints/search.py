@@ -0,0 +1,45 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.crud import crud_project
+from app.models.user import User
+from app.schemas.project import ProjectFileSearchHit
+from app.search import resolve_extensions, search_index
+from app.api.v1.endpoints.auth import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/files", response_model=List[ProjectFileSearchHit])
+async def search_files(
+    *,
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=2, max_length=200),
+    project_id: Optional[int] = None,
+    language: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Search file contents and paths across the current user's projects.
+
+    Matches whole words, symbols (``get_current_user`` or ``getCurrentUser``)
+    and substrings, best matches first. Narrow with ``project_id`` (which may
+    also be a public project) and ``language`` names or extensions such as
+    ``python`` or ``.tsx``.
+    """
+    if project_id is not None:
+        project = await crud_project.get(db, project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if project.owner_id != current_user.id and not project.is_public:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        project_ids = [project_id]
+    else:
+        project_ids = await crud_project.get_ids_by_owner(db, owner_id=current_user.id)
+    
+    return await search_index.search(
+        db, q, project_ids=project_ids, extensions=resolve_extensions(language), limit=limit
+    )
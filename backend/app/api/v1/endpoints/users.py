@@ -1,32 +1,46 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Body
 from pydantic import EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.conditional import is_not_modified, make_etag, not_modified, set_validators
 from app.core.database import get_db
+from app.core.hashing import password_hasher
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.responses import model_response
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserUpdate, PasswordUpdate
-from app.api.v1.endpoints.auth import get_current_active_user, get_current_active_superuser
-from app.core.security import verify_password, get_password_hash
-from app.crud.crud_user import update
+from app.api.v1.endpoints.auth import get_current_active_user, get_current_active_superuser, write_rate_limit
+from app.crud import crud_user
 
 router = APIRouter()
 
 
 @router.get("/me", response_model=UserSchema)
-def read_user_me(
+async def read_user_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get current user.
+
+    Conditional requests are answered with 304 when the user is unchanged.
+    The ETag covers only the serialized fields, never the password hash.
     """
-    return current_user
+    user = UserSchema.model_validate(current_user)
+    etag = make_etag(user.model_dump())
+    last_modified = current_user.updated_at or current_user.created_at
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    set_validators(response, etag, last_modified)
+    return user
 
 
-@router.put("/me", response_model=UserSchema)
-def update_user_me(
+@router.put("/me", response_model=UserSchema, dependencies=[Depends(write_rate_limit)])
+async def update_user_me(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     password: str = Body(None),
     full_name: str = Body(None),
     email: EmailStr = Body(None),
@@ -42,20 +56,20 @@ def update_user_me(
         current_user_data.full_name = full_name
     if email is not None:
         current_user_data.email = email
-    user = update(db=db, db_obj=current_user, obj_in=current_user_data)
+    user = await crud_user.update(db=db, db_obj=current_user, obj_in=current_user_data)
     return user
 
 
 @router.get("/{user_id}", response_model=UserSchema)
-def read_user_by_id(
+async def read_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await crud_user.get(db, user_id)
     if user == current_user:
         return user
     if not current_user.is_superuser:
@@ -65,38 +79,46 @@ def read_user_by_id(
     return user
 
 
-@router.put("/me/password", response_model=UserSchema)
-def update_password(
+@router.put("/me/password", response_model=UserSchema, dependencies=[Depends(write_rate_limit)])
+async def update_password(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     password_in: PasswordUpdate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Update password for current user.
     """
-    if not verify_password(password_in.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(password_in.current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect password"
         )
     
-    current_user.hashed_password = get_password_hash(password_in.new_password)
+    current_user.hashed_password = await password_hasher.hash(password_in.new_password)
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     return current_user
 
 
 @router.get("/", response_model=List[UserSchema])
-def read_users(
-    db: Session = Depends(get_db),
+async def read_users(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to page in
+    constant time; ``skip`` is ignored when a cursor is given.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users 
\ No newline at end of file
+    after_id = decode_cursor(cursor) if cursor else None
+    users = await crud_user.get_multi(db, skip=skip, limit=limit, after_id=after_id)
+    set_next_cursor(request, response, users, limit)
+    return model_response(List[UserSchema], users, response) 
\ No newline at end of file
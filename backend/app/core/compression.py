@@ -0,0 +1,279 @@
+import gzip
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+# Bodies at least this large are compressed off the event loop
+THREADPOOL_MIN_SIZE = 64 * 1024
+# Long-lived: compressed blobs are keyed by an immutable content hash
+COMPRESSED_BLOB_CACHE_TTL_SECONDS = 24 * 3600
+
+
+class Codec:
+    """One Content-Encoding: whole-body and incremental compression"""
+
+    name = ""
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def compressor(self) -> "StreamCompressor":
+        raise NotImplementedError
+
+
+class StreamCompressor:
+    def __init__(self, compress, finish):
+        self._compress = compress
+        self._finish = finish
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def compress(self, data: bytes) -> bytes:
+        # Fixed mtime so equal input always yields equal output
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+    def compressor(self) -> StreamCompressor:
+        stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return StreamCompressor(stream.compress, stream.flush)
+
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+
+    def compressor(self) -> StreamCompressor:
+        stream = brotli.Compressor(quality=BROTLI_QUALITY)
+        return StreamCompressor(stream.process, stream.finish)
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+    def compressor(self) -> StreamCompressor:
+        stream = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return StreamCompressor(stream.compress, stream.flush)
+
+
+def available_codecs(names: Sequence[str]) -> List[Codec]:
+    """Codecs for ``names`` in order, skipping those whose package is missing"""
+    known: Dict[str, Optional[type]] = {
+        "gzip": GzipCodec,
+        "br": BrotliCodec if brotli is not None else None,
+        "zstd": ZstdCodec if zstandard is not None else None,
+    }
+    codecs = []
+    for name in names:
+        if name not in known:
+            raise ValueError(f"Unknown compression encoding '{name}'")
+        if known[name] is not None:
+            codecs.append(known[name]())
+    return codecs
+
+
+def choose_codec(accept_encoding: str, codecs: Sequence[Codec]) -> Optional[Codec]:
+    """
+    Pick the codec the client weights highest in ``Accept-Encoding``,
+    breaking ties by server preference (the order of ``codecs``).
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[token] = weight
+    best, best_weight = None, 0.0
+    for codec in codecs:
+        weight = weights.get(codec.name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+def add_vary(headers: MutableHeaders, field: str) -> None:
+    """Add ``field`` to Vary unless it is already listed (or Vary is ``*``)"""
+    listed = {item.strip().lower() for item in headers.get("vary", "").split(",")}
+    if field.lower() not in listed and "*" not in listed:
+        headers.add_vary_header(field)
+
+
+def split_setting(value: str) -> List[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with gzip, brotli or zstd as negotiated.
+
+    Only bodies of at least ``minimum_size`` bytes whose Content-Type starts
+    with an allowlisted prefix are touched; responses that already carry a
+    Content-Encoding (such as precompressed blobs) pass through. Streaming
+    responses are compressed incrementally. A strong ETag is weakened on
+    compression, since the bytes no longer match the tagged representation.
+    """
+
+    def __init__(
+        self, app: ASGIApp, *, codecs: Sequence[Codec], minimum_size: int = 1024,
+        content_types: Sequence[str] = ("application/json", "text/"),
+    ):
+        self.app = app
+        self.codecs = list(codecs)
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
+        codec = choose_codec(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        responder = _CompressionResponder(self, codec, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, codec: Optional[Codec], send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.stream: Optional[StreamCompressor] = None
+
+    def _eligible(self, headers: MutableHeaders, status: int) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(self.middleware.content_types)
+
+    def _mark_compressed(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.codec.name
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start until the first body chunk shows the size
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.stream is not None:
+            chunk = self.stream.compress(body)
+            if not more_body:
+                chunk += self.stream.finish()
+            await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+            return
+        if self.start is None:
+            # Passing an uncompressed response through
+            await self.downstream(message)
+            return
+
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        if not self._eligible(headers, start["status"]):
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+        # Downloads negotiate their own encoding and may have set this already
+        add_vary(headers, "Accept-Encoding")
+        if self.codec is None or (not more_body and len(body) < self.middleware.minimum_size):
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+
+        self._mark_compressed(headers)
+        if not more_body:
+            if len(body) >= THREADPOOL_MIN_SIZE:
+                compressed = await run_in_threadpool(self.codec.compress, body)
+            else:
+                compressed = self.codec.compress(body)
+            headers["Content-Length"] = str(len(compressed))
+            await self.downstream(start)
+            await self.downstream({"type": "http.response.body", "body": compressed})
+            return
+
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self.stream = self.codec.compressor()
+        await self.downstream(start)
+        await self.downstream(
+            {"type": "http.response.body", "body": self.stream.compress(body), "more_body": True}
+        )
+
+
+class CompressedBlobCache:
+    """
+    Compressed representations of immutable file bodies, keyed by
+    ``(content_hash, encoding)`` so repeat downloads skip recompression.
+    """
+
+    def __init__(self, max_size: int, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._cache = TTLCache(max_size=max_size, ttl=COMPRESSED_BLOB_CACHE_TTL_SECONDS)
+
+    def get(self, digest: str, encoding: str) -> Optional[bytes]:
+        return self._cache.get((digest, encoding))
+
+    async def store(self, digest: str, data: bytes, codec: Codec) -> bytes:
+        """Compress ``data`` with ``codec``, caching the result if it is small enough"""
+        if len(data) >= THREADPOOL_MIN_SIZE:
+            compressed = await run_in_threadpool(codec.compress, data)
+        else:
+            compressed = codec.compress(data)
+        if len(data) <= self.max_bytes:
+            self._cache.set((digest, codec.name), compressed)
+        return compressed
+
+    def stats(self) -> Dict[str, object]:
+        return self._cache.stats()
+
+
+response_codecs = available_codecs(split_setting(settings.COMPRESSION_ENCODINGS))
+
+compressed_blob_cache = CompressedBlobCache(
+    max_size=settings.COMPRESSED_BLOB_CACHE_MAX_SIZE,
+    max_bytes=settings.COMPRESSED_BLOB_CACHE_MAX_BYTES,
+)
@@ -15,14 +15,37 @@ class Settings(BaseSettings):
 
     # Database - required environment variable
     DATABASE_URL: str
+
+    # Database connection pool - applies to each engine in each worker; the
+    # database rate limiter briefly takes a second connection per limited request
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
     
     # Stripe - required for payment functionality
     STRIPE_SECRET_KEY: str
     STRIPE_WEBHOOK_SECRET: str
+    # Stripe API client - pooled async HTTP with retries and a circuit breaker
+    STRIPE_API_BASE: str = "https://api.stripe.com"
+    STRIPE_TIMEOUT_SECONDS: float = 10.0  # per attempt
+    STRIPE_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    STRIPE_MAX_RETRIES: int = 2
+    STRIPE_MAX_CONNECTIONS: int = 20  # per worker
+    STRIPE_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    STRIPE_CIRCUIT_RESET_SECONDS: float = 30.0
+    # Stripe webhook inbox - verified events are queued and applied by workers
+    STRIPE_WEBHOOK_WORKERS: int = 4
+    STRIPE_WEBHOOK_MAX_ATTEMPTS: int = 8
+    STRIPE_WEBHOOK_POLL_SECONDS: float = 1.0
 
     
     # Google OAuth - required for Google login
     GOOGLE_CLIENT_ID: str
+    # Signing keys for ID tokens, cached for the response's max-age
+    GOOGLE_CERTS_URL: str = "https://www.googleapis.com/oauth2/v3/certs"
     
     # Email configuration - optional but configurable
     SMTP_TLS: bool = True
@@ -37,6 +60,72 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: str = "admin@fluxa.com"
     FIRST_SUPERUSER_PASSWORD: str = "admin123"
 
+    # Password hashing - bcrypt runs on a bounded worker pool
+    PASSWORD_HASH_MAX_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Authenticated-user cache - per worker, 0 disables
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Verified-token cache - per worker, 0 disables
+    TOKEN_CACHE_TTL_SECONDS: int = 3600  # upper bound; entries also expire at the token's exp
+    TOKEN_NEGATIVE_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+
+    # Response compression - encodings in preference order; br and zstd are
+    # used only when the brotli / zstandard packages are installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_ENCODINGS: str = "br,zstd,gzip"
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_CONTENT_TYPES: str = "application/json,text/,application/javascript,image/svg+xml"
+    COMPRESSED_BLOB_CACHE_MAX_SIZE: int = 1000  # entries per worker, 0 disables
+    COMPRESSED_BLOB_CACHE_MAX_BYTES: int = 1024 * 1024  # larger blobs are not cached
+
+    # Idempotency-Key replay for POST/PATCH - per worker, 0 disables
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 10000
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 256 * 1024  # larger responses are not stored
+    IDEMPOTENCY_MAX_REQUEST_BYTES: int = 1024 * 1024  # larger and multipart requests skip replay
+
+    # File content storage - database (inline), local or s3
+    BLOB_STORAGE_BACKEND: str = "database"
+    BLOB_STORAGE_PATH: str = "data/blobs"
+    S3_ENDPOINT_URL: str = "https://s3.amazonaws.com"
+    S3_BUCKET: Optional[str] = None
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PREFIX: str = "blobs/"
+
+    # File search - postgres (tsvector + trigram), memory (in-process) or auto
+    SEARCH_BACKEND: str = "auto"
+
+    # Rate limiting - token buckets per route class; database shares them
+    # across workers, memory is per worker, auto picks database on Postgres
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "auto"
+    RATE_LIMIT_AUTH: str = "10/60"  # requests/seconds per client IP: login, register, google
+    RATE_LIMIT_WRITE: str = "120/60"  # per user: project, file and profile writes
+    RATE_LIMIT_PAYMENTS: str = "10/60"  # per user: checkout and cancel
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # only behind a proxy that sets it
+    RATE_LIMIT_PROXY_HOPS: int = 1  # trusted proxies appending to X-Forwarded-For
+
+    # SQL instrumentation - slow-query log, N+1 warnings and per-request budgets
+    QUERY_SLOW_MS: int = 200  # 0 disables
+    QUERY_REPEAT_THRESHOLD: int = 10  # same statement this often in one request; 0 disables
+    QUERY_BUDGET: int = 0  # max statements per request, 0 for none
+    QUERY_BUDGET_ENFORCE: bool = False  # raise instead of logging; meant for tests
+
+    # Prometheus metrics on /metrics - per worker; set a token to require it
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+
+    # Readiness probe on /health/ready - results are cached per worker
+    HEALTH_CACHE_SECONDS: float = 2.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0  # slower than this fails the probe
+    HEALTH_DB_SLOW_MS: int = 500  # slower than this reports degraded
+
     class Config:
         case_sensitive = True
         env_file_encoding = "utf-8"
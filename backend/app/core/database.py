@@ -1,17 +1,84 @@
+from typing import Any, Dict, Type
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolMonitor, instrument_pool_class
 
-engine = create_engine(settings.DATABASE_URL)
+# Async drivers used for each sync dialect in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Translate a sync DATABASE_URL into its async driver equivalent"""
+    db_url = make_url(url)
+    backend = db_url.get_backend_name()
+    if db_url.get_driver_name() == ASYNC_DRIVERS.get(backend):
+        return url
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return db_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def get_pool_options(url: str, pool_class: Type[Pool], monitor: PoolMonitor) -> Dict[str, Any]:
+    """Pool sizing and instrumentation for a queue-pooled engine"""
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "sqlite" and db_url.database in (None, "", ":memory:"):
+        # In-memory SQLite shares one connection; sizing does not apply
+        return {}
+    return {
+        "poolclass": instrument_pool_class(pool_class, monitor),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+slow_checkout_seconds = settings.DB_POOL_SLOW_CHECKOUT_MS / 1000
+sync_pool_monitor = PoolMonitor("sync", slow_checkout_seconds)
+async_pool_monitor = PoolMonitor("async", slow_checkout_seconds)
+
+# Sync engine - used by migrations and one-off scripts
+engine = create_engine(
+    settings.DATABASE_URL,
+    **get_pool_options(settings.DATABASE_URL, QueuePool, sync_pool_monitor),
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine - used by all API request handling
+async_database_url = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    async_database_url,
+    **get_pool_options(async_database_url, AsyncAdaptedQueuePool, async_pool_monitor),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Checked-out/overflow counts and checkout wait percentiles per engine"""
+    return {
+        "async": async_pool_monitor.stats(async_engine.sync_engine.pool),
+        "sync": sync_pool_monitor.stats(engine.pool),
+    }
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close() 
\ No newline at end of file
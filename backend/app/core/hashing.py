@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from passlib.context import CryptContext
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Password hashing
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when the hashing executor has no free worker or queue slot"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so a small thread pool keeps the
+    event loop responsive without the pickling overhead of a process pool.
+    At most ``max_workers + max_queue`` jobs are admitted at once; anything
+    beyond that is rejected immediately instead of piling up behind a login
+    storm.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hash"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_seconds = 0.0
+
+    def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._total_seconds += elapsed
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Password hashing executor saturated, rejecting request")
+            raise PasswordHasherOverloaded("Password hashing capacity exceeded")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._run, fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await asyncio.wrap_future(
+            self._submit(pwd_context.verify, plain_password, hashed_password)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of executor saturation"""
+        with self._lock:
+            pending = self._pending
+            running = self._running
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": running,
+                "queued": max(pending - running, 0),
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_seconds": self._total_seconds / completed if completed else 0.0,
+                "saturation": pending / (self.max_workers + self.max_queue),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_MAX_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,271 @@
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.security import decode_access_token
+from app.core.user_cache import user_cache
+from app.models.user import User
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+# Methods that are not idempotent by definition
+IDEMPOTENT_METHODS = ("POST", "PATCH")
+# Failures worth retrying, including after signing in again, are not remembered
+UNSTORED_STATUSES = (401, 403, 408, 425, 429)
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "subject", "status", "headers", "body")
+
+    def __init__(
+        self, fingerprint: str, subject: Optional[str], status: int,
+        headers: List[Tuple[bytes, bytes]], body: bytes,
+    ):
+        self.fingerprint = fingerprint
+        self.subject = subject
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class IdempotencyStore:
+    """
+    Completed responses by idempotency key, plus the requests still running.
+
+    A retry that arrives while the first request is in flight waits for it
+    instead of running the endpoint again. Per process: retries landing on
+    another worker run the endpoint once more, which is why the Stripe calls
+    also pass Stripe's own idempotency keys.
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_body_bytes: int, max_request_bytes: int):
+        self.max_body_bytes = max_body_bytes
+        self.max_request_bytes = max_request_bytes
+        self._responses = TTLCache(max_size=max_size, ttl=ttl)
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._responses.enabled
+
+    def get(self, key: Tuple) -> Optional[StoredResponse]:
+        return self._responses.get(key)
+
+    def in_flight(self, key: Tuple) -> Optional[asyncio.Future]:
+        return self._in_flight.get(key)
+
+    def begin(self, key: Tuple) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future
+
+    def finish(self, key: Tuple, stored: Optional[StoredResponse]) -> None:
+        if stored is not None:
+            self._responses.set(key, stored)
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._responses.stats(), "in_flight": len(self._in_flight), "coalesced": self.coalesced}
+
+
+class IdempotencyMiddleware:
+    """
+    Honour an ``Idempotency-Key`` header on POST and PATCH requests.
+
+    The first response for a key (per caller, method and path) is stored and
+    replayed to retries with ``Idempotent-Replayed: true``. Reusing a key with
+    a different body is rejected with 422. Server errors, auth failures and
+    streamed or oversized bodies are not stored, so a retry runs the request
+    again. Multipart and oversized request bodies bypass the middleware, as
+    it would otherwise hold them in memory.
+
+    Keys are scoped to the bearer token's subject, and a response is only
+    replayed while the token still verifies and its user is active; an
+    expired token no longer finds the stored response and reaches the
+    endpoint's own authentication.
+    """
+
+    def __init__(self, app: ASGIApp, *, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS or not self.store.enabled:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(IDEMPOTENCY_HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        if not self._bufferable(headers):
+            await self.app(scope, receive, send)
+            return
+        body, complete = await _read_body(receive, self.store.max_request_bytes)
+        if not complete:
+            # Streamed past the cap; hand over what was read and the rest as is
+            await self.app(scope, _replay_receive(body, receive, more_body=True), send)
+            return
+
+        subject = _token_subject(headers)
+        # Keys are scoped to the caller so users cannot collide
+        principal = subject or hashlib.sha256(headers.get("authorization", "").encode()).hexdigest()
+        key = (subject is not None, principal, scope["method"], scope["path"], idempotency_key)
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"?" + body).hexdigest()
+
+        while True:
+            stored = self.store.get(key)
+            if stored is not None:
+                await self._replay(stored, fingerprint, scope, receive, send)
+                return
+            pending = self.store.in_flight(key)
+            if pending is None:
+                break
+            self.store.coalesced += 1
+            await asyncio.shield(pending)
+
+        self.store.begin(key)
+        recorder = _ResponseRecorder(send, self.store.max_body_bytes)
+        stored = None
+        try:
+            await self.app(scope, _replay_receive(body, receive), recorder.send)
+            stored = recorder.stored(fingerprint, subject)
+        finally:
+            self.store.finish(key, stored)
+
+    def _bufferable(self, headers: Headers) -> bool:
+        if headers.get("content-type", "").lower().startswith("multipart/"):
+            return False
+        length = headers.get("content-length", "")
+        return not (length.isdigit() and int(length) > self.store.max_request_bytes)
+
+    async def _replay(
+        self, stored: StoredResponse, fingerprint: str, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request"}, status_code=422
+            )
+            await response(scope, receive, send)
+            return
+        if stored.subject is not None and not await _is_active(stored.subject):
+            response = JSONResponse({"detail": "Inactive user"}, status_code=400)
+            await response(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(REPLAYED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+def _token_subject(headers: Headers) -> Optional[str]:
+    """Subject of a bearer token that still verifies, or None"""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return payload.get("sub") if payload else None
+
+
+async def _is_active(email: str) -> bool:
+    cached = user_cache.get(email)
+    if cached is not None:
+        return bool(cached["is_active"])
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User.is_active).where(User.email == email))
+        return bool(result.scalar())
+
+
+async def _read_body(receive: Receive, max_bytes: int) -> Tuple[bytes, bool]:
+    """The request body and whether it is complete; stops early past ``max_bytes``"""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get("more_body", False):
+            break
+        if size > max_bytes:
+            return b"".join(chunks), False
+    return b"".join(chunks), True
+
+
+def _replay_receive(body: bytes, receive: Receive, more_body: bool = False) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": more_body}
+        return await receive()
+
+    return replay
+
+
+class _ResponseRecorder:
+    """Forwards a response while keeping a copy of it if it is small enough"""
+
+    def __init__(self, send: Send, max_body_bytes: int):
+        self.downstream = send
+        self.max_body_bytes = max_body_bytes
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body: Optional[bytes] = None
+        self.storable = True
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            if message.get("more_body", False) or self.body is not None:
+                # Streamed; replaying it would mean holding it all
+                self.storable = False
+            body = message.get("body", b"")
+            if len(body) > self.max_body_bytes:
+                self.storable = False
+            if self.storable:
+                self.body = body
+        await self.downstream(message)
+
+    def stored(self, fingerprint: str, subject: Optional[str]) -> Optional[StoredResponse]:
+        if (
+            not self.storable or self.body is None or self.status is None
+            or self.status >= 500 or self.status in UNSTORED_STATUSES
+        ):
+            return None
+        return StoredResponse(fingerprint, subject, self.status, self.headers, self.body)
+
+
+idempotency_store = IdempotencyStore(
+    max_size=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_body_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+    max_request_bytes=settings.IDEMPOTENCY_MAX_REQUEST_BYTES,
+)
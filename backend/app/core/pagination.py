@@ -0,0 +1,39 @@
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past the row with ``last_id``"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError
+        return last_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(request: Request, response: Response, rows: Sequence[Any], limit: int) -> Optional[str]:
+    """
+    Advertise the next page via ``X-Next-Cursor`` and an RFC 8288 ``Link``.
+
+    A short page means the listing is exhausted, so no cursor is emitted.
+    """
+    if limit <= 0 or len(rows) < limit:
+        return None
+    cursor = encode_cursor(rows[-1].id)
+    next_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor)
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return cursor
@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+# Minimum gap between repeated slow-checkout warnings
+WARN_INTERVAL_SECONDS = 10.0
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class PoolMonitor:
+    """
+    Records connection checkout waits for one engine's pool.
+
+    Waits are kept in a fixed-size window so percentiles reflect recent
+    traffic and memory stays bounded.
+    """
+
+    def __init__(self, name: str, slow_checkout_seconds: float, window: int = 2048):
+        self.name = name
+        self.slow_checkout_seconds = slow_checkout_seconds
+        self._waits: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._last_warning = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+            self._checkouts += 1
+        if seconds >= self.slow_checkout_seconds:
+            now = time.monotonic()
+            if now - self._last_warning >= WARN_INTERVAL_SECONDS:
+                self._last_warning = now
+                logger.warning(
+                    "Slow %s pool checkout: waited %.1f ms for a connection",
+                    self.name, seconds * 1000,
+                )
+
+    def record_timeout(self, pool: Pool) -> None:
+        with self._lock:
+            self._timeouts += 1
+        logger.error("%s pool exhausted: %s", self.name, pool.status())
+
+    def stats(self, pool: Pool) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and recent checkout waits"""
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts = self._checkouts
+            timeouts = self._timeouts
+        stats: Dict[str, Any] = {
+            "pool_class": type(pool).__name__,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "checkout_wait_p50_ms": _percentile(waits, 0.50) * 1000,
+            "checkout_wait_p99_ms": _percentile(waits, 0.99) * 1000,
+            "checkout_wait_max_ms": (waits[-1] if waits else 0.0) * 1000,
+        }
+        # Only queue-style pools track size and overflow
+        if hasattr(pool, "checkedout"):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            })
+        return stats
+
+
+def instrument_pool_class(pool_class: Type[Pool], monitor: PoolMonitor) -> Type[Pool]:
+    """
+    Build a pool subclass that reports checkout waits to ``monitor``.
+
+    The subclass survives ``Pool.recreate()`` (used by ``engine.dispose()``)
+    because recreation instantiates ``self.__class__``.
+    """
+
+    class InstrumentedPool(pool_class):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                connection = super().connect()
+            except exc.TimeoutError:
+                monitor.record_timeout(self)
+                raise
+            monitor.record_wait(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    InstrumentedPool.__qualname__ = InstrumentedPool.__name__
+    return InstrumentedPool
@@ -0,0 +1,199 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Connection.info key holding start times of statements in progress
+_QUERY_STARTS = "query_tracking_starts"
+# Statements are shortened to this in log lines
+LOG_STATEMENT_CHARS = 500
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request ran more SQL statements than its budget allows"""
+
+
+def _short(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= LOG_STATEMENT_CHARS else statement[:LOG_STATEMENT_CHARS] + "..."
+
+
+def describe_scope(scope: Optional[Scope]) -> str:
+    """``METHOD /route/{template}`` for log lines, or ``-`` outside requests"""
+    if not scope:
+        return "-"
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', None) or scope.get('path', '')}"
+
+
+class RequestQueries:
+    """SQL executed on behalf of one request"""
+
+    __slots__ = ("scope", "count", "seconds", "statements", "budget")
+
+    def __init__(self, scope: Any = None, budget: Optional[int] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        # Executions per distinct statement text; parameters are not part of
+        # the text, so a query issued once per row shows up as one hot entry
+        self.statements: Dict[str, int] = {}
+        self.budget = budget
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least ``threshold`` times (likely N+1)"""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+class QueryTotals:
+    """Statements executed by this process, inside requests or not"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.errors = 0
+        self.slow = 0
+        self.repeated = 0
+        self.over_budget = 0
+
+    def record(self, seconds: float, slow: bool) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.slow += slow
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def record_request(self, repeated: int, over_budget: bool) -> None:
+        with self._lock:
+            self.repeated += repeated
+            self.over_budget += over_budget
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "seconds": self.seconds,
+                "errors": self.errors,
+                "slow": self.slow,
+                "repeated": self.repeated,
+                "over_budget": self.over_budget,
+            }
+
+
+query_totals = QueryTotals()
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+def _report(queries: RequestQueries) -> None:
+    where = describe_scope(queries.scope)
+    repeated: Dict[str, int] = {}
+    if settings.QUERY_REPEAT_THRESHOLD > 0:
+        repeated = queries.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        for statement, count in repeated.items():
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", where, count, _short(statement))
+    over_budget = queries.over_budget()
+    if over_budget:
+        logger.warning("%s ran %d SQL statements, budget is %d", where, queries.count, queries.budget)
+    query_totals.record_request(len(repeated), over_budget)
+
+
+@contextmanager
+def track_queries(scope: Any = None) -> Iterator[RequestQueries]:
+    """
+    Attribute statements executed inside the block to a new RequestQueries.
+
+    On exit, statements repeated ``QUERY_REPEAT_THRESHOLD`` times and a
+    blown query budget are logged; with ``QUERY_BUDGET_ENFORCE`` a blown
+    budget raises ``QueryBudgetExceeded`` so test clients fail loudly.
+    """
+    queries = RequestQueries(scope, budget=settings.QUERY_BUDGET or None)
+    token = _current.set(queries)
+    try:
+        yield queries
+    finally:
+        _current.reset(token)
+        _report(queries)
+    if settings.QUERY_BUDGET_ENFORCE and queries.over_budget():
+        raise QueryBudgetExceeded(
+            f"{describe_scope(scope)} ran {queries.count} SQL statements, budget is {queries.budget}"
+        )
+
+
+def query_budget(limit: int) -> Callable:
+    """Route dependency overriding ``QUERY_BUDGET`` for one endpoint"""
+
+    async def dependency() -> None:
+        queries = _current.get()
+        if queries is not None:
+            queries.budget = limit
+
+    return dependency
+
+
+class QueryTrackingMiddleware:
+    """Track the SQL each HTTP request runs; see ``track_queries``"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(scope):
+            await self.app(scope, receive, send)
+
+
+# Listening on Engine covers the sync engine and the async engine's sync core
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_QUERY_STARTS, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info[_QUERY_STARTS].pop()
+    queries = _current.get()
+    slow = settings.QUERY_SLOW_MS > 0 and elapsed * 1000 >= settings.QUERY_SLOW_MS
+    query_totals.record(elapsed, slow)
+    if queries is not None:
+        queries.record(statement, elapsed)
+    if slow:
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s",
+            elapsed * 1000, describe_scope(queries.scope if queries else None), _short(statement),
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context) -> None:
+    starts = exception_context.connection.info.get(_QUERY_STARTS) if exception_context.connection else None
+    if starts:
+        starts.pop()
+    query_totals.record_error()
@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+
+    ``bytes`` content is taken as already-encoded JSON and sent untouched,
+    which is how ``model_response`` hands over pydantic's output.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema: Any) -> TypeAdapter:
+    # Building an adapter compiles a validator and serializer; do it once per type
+    return TypeAdapter(schema)
+
+
+def model_response(
+    schema: Any, obj: Any, response: Optional[Response] = None, status_code: int = 200
+) -> FastJSONResponse:
+    """
+    Validate ``obj`` (ORM instances welcome) against ``schema`` once and
+    encode it straight to JSON bytes in pydantic-core.
+
+    Returning this from an endpoint bypasses FastAPI's ``response_model``
+    pass, which validates again and then encodes through
+    ``jsonable_encoder`` and the stdlib ``json`` module. Keep
+    ``response_model`` on the route for the OpenAPI schema. Headers set on
+    the injected ``response`` are carried over.
+    """
+    adapter = type_adapter(schema)
+    body = adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+    json_response = FastJSONResponse(body, status_code=status_code)
+    if response is not None:
+        json_response.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers
+            if name not in (b"content-length", b"content-type")
+        )
+    return json_response
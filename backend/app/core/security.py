@@ -1,12 +1,25 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Dict, Union, Optional
 from jose import jwt
-from passlib.context import CryptContext
+from sqlalchemy import select
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.hashing import password_hasher
 from app.models.user import User
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Verified claims keyed by token digest; entries never outlive the token's exp
+token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+# Digests of recently rejected tokens, so replayed bad tokens skip the HMAC
+rejected_token_cache = TTLCache(
+    max_size=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_NEGATIVE_CACHE_TTL_SECONDS,
+)
 
 
 def create_access_token(
@@ -23,46 +36,57 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
+async def create_first_superuser():
+    async with AsyncSessionLocal() as db:
+        try:
+            # Check if superuser already exists
+            result = await db.execute(select(User).where(User.email == settings.FIRST_SUPERUSER))
+            existing_user = result.scalars().first()
+            if existing_user:
+                return
+            
+            # Create superuser
+            hashed_password = await password_hasher.hash(settings.FIRST_SUPERUSER_PASSWORD)
+            superuser = User(
+                email=settings.FIRST_SUPERUSER,
+                hashed_password=hashed_password,
+                is_active=True,
+                is_superuser=True,
+                full_name="Admin User"
+            )
+            db.add(superuser)
+            await db.commit()
+            print(f"Superuser created: {settings.FIRST_SUPERUSER}")
+        except Exception as e:
+            print(f"Error creating superuser: {e}")
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
 
+def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify a JWT and return its claims, caching the outcome by token digest"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return dict(payload)
+    if rejected_token_cache.get(key) is not None:
+        return None
 
-async def create_first_superuser():
-    db = SessionLocal()
     try:
-        # Check if superuser already exists
-        existing_user = db.query(User).filter(User.email == settings.FIRST_SUPERUSER).first()
-        if existing_user:
-            return
-        
-        # Create superuser
-        hashed_password = get_password_hash(settings.FIRST_SUPERUSER_PASSWORD)
-        superuser = User(
-            email=settings.FIRST_SUPERUSER,
-            hashed_password=hashed_password,
-            is_active=True,
-            is_superuser=True,
-            full_name="Admin User"
-        )
-        db.add(superuser)
-        db.commit()
-        print(f"Superuser created: {settings.FIRST_SUPERUSER}")
-    except Exception as e:
-        print(f"Error creating superuser: {e}")
-    finally:
-        db.close()
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except jwt.JWTError:
+        rejected_token_cache.set(key, True)
+        return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        token_cache.set(key, payload, ttl=exp - time.time())
+    return dict(payload)
 
 
 def verify_token(token: str) -> Optional[str]:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except jwt.JWTError:
-        return None 
\ No newline at end of file
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    username: str = payload.get("sub")
+    if username is None:
+        return None
+    return username 
\ No newline at end of file
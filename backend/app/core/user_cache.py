@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+# Session.info key collecting emails to drop once the transaction commits
+PENDING_INVALIDATIONS = "user_cache_pending"
+
+
+def _cache_keys(user: User) -> set:
+    """Every email the user is or was cached under"""
+    history = inspect(user).attrs.email.history
+    return {email for email in (*history.deleted, *history.unchanged, *history.added) if email}
+
+
+class UserCache:
+    """
+    Per-process cache of authenticated users keyed by token subject (email).
+
+    Only column values are cached, never live ORM instances, so each request
+    gets its own persistent ``User`` bound to its own session. Any ORM flush
+    that changes or deletes a user invalidates that user's entry; other
+    workers converge within ``USER_CACHE_TTL_SECONDS``.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+
+    def get(self, email: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(email)
+
+    def store(self, user: User) -> None:
+        state = inspect(user)
+        if state.expired_attributes or any(key not in state.dict for key in self._columns):
+            # Partially loaded instance; caching it would hide a DB read
+            return
+        self._cache.set(user.email, {key: state.dict[key] for key in self._columns})
+
+    async def attach(self, db: AsyncSession, values: Dict[str, Any]) -> User:
+        """Rebuild a cached user as a persistent instance without a SELECT"""
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    def invalidate(self, email: Optional[str]) -> None:
+        if email:
+            self._cache.delete(email)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_flushed_users(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(PENDING_INVALIDATIONS, set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            pending.update(_cache_keys(obj))
+    for email in pending:
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    # Drop again after commit so a concurrent request cannot re-cache the
+    # pre-commit row between our flush and commit
+    for email in session.info.pop(PENDING_INVALIDATIONS, ()):
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_invalidations(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS, None)
@@ -0,0 +1,383 @@
+import asyncio
+import posixpath
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import select
+from sqlalchemy import delete as sql_delete
+from sqlalchemy import insert as sql_insert
+from sqlalchemy import update as sql_update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
+from app.models.project import Project, ProjectFile
+from app.search import search_index
+from app.search.base import file_document
+from app.storage import BlobStoreNotConfigured, blob_store, content_digest
+
+# Concurrent blob reads/writes when handling many files at once
+BLOB_IO_CONCURRENCY = 16
+# File columns that determine a project read, with content stood in for by its hash
+FILE_VERSION_COLUMNS = (
+    ProjectFile.id, ProjectFile.name, ProjectFile.path, ProjectFile.file_type,
+    ProjectFile.size, ProjectFile.content_hash, ProjectFile.created_at, ProjectFile.updated_at,
+)
+# Columns bulk sync reads to tell whether an upsert changes anything; the
+# body is compared through content_hash
+SYNC_COMPARED_COLUMNS = (
+    ProjectFile.id, ProjectFile.path, ProjectFile.name, ProjectFile.file_type, ProjectFile.content_hash,
+)
+# Set from content_hash, so not compared on their own
+SYNC_DERIVED_FIELDS = ("inline_content", "size")
+
+
+async def _store_content(obj_in: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Translate a ``content`` field into column values.
+
+    With a blob store configured the body is written there and only its
+    hash and size are kept on the row; otherwise it stays inline.
+    """
+    if "content" not in obj_in:
+        return obj_in
+    values = dict(obj_in)
+    content = values.pop("content")
+    if content is None:
+        return {**values, "inline_content": None, "size": None, "content_hash": None}
+    data = content.encode("utf-8")
+    if blob_store is None:
+        return {**values, "inline_content": content, "size": len(data), "content_hash": content_digest(data)}
+    digest = await blob_store.put(data)
+    return {**values, "inline_content": None, "size": len(data), "content_hash": digest}
+
+
+async def load_contents(files: Iterable[ProjectFile]) -> None:
+    """Fetch bodies of blob-backed files so ``ProjectFile.content`` is populated"""
+    pending = [f for f in files if f.inline_content is None and f.content_hash is not None]
+    if not pending:
+        return
+    if blob_store is None:
+        # Rather than serving migrated files as empty
+        raise BlobStoreNotConfigured(pending[0].content_hash)
+    semaphore = asyncio.Semaphore(BLOB_IO_CONCURRENCY)
+
+    async def fetch(file_obj: ProjectFile) -> None:
+        async with semaphore:
+            data = await blob_store.get(file_obj.content_hash)
+        file_obj.set_loaded_content(data.decode("utf-8"))
+
+    await asyncio.gather(*(fetch(f) for f in pending))
+
+
+async def get(db: AsyncSession, id: int) -> Optional[Project]:
+    return await db.get(Project, id)
+
+
+async def get_with_files(db: AsyncSession, id: int) -> Optional[Project]:
+    result = await db.execute(
+        select(Project).options(selectinload(Project.files)).where(Project.id == id)
+    )
+    project = result.scalars().first()
+    if project:
+        await load_contents(project.files)
+    return project
+
+
+async def get_multi_by_owner(
+    db: AsyncSession, *, owner_id: int, skip: int = 0, limit: int = 100,
+    after_id: Optional[int] = None
+) -> list[Project]:
+    """Page by offset, or by keyset on (owner_id, id) when ``after_id`` is given"""
+    query = select(Project).where(Project.owner_id == owner_id).order_by(Project.id)
+    if after_id is not None:
+        query = query.where(Project.id > after_id)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
+
+
+async def get_ids_by_owner(db: AsyncSession, *, owner_id: int) -> List[int]:
+    result = await db.execute(select(Project.id).where(Project.owner_id == owner_id))
+    return list(result.scalars().all())
+
+
+async def create(db: AsyncSession, *, obj_in: Dict[str, Any], owner_id: int) -> Project:
+    db_obj = Project(**obj_in, owner_id=owner_id)
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def update(db: AsyncSession, *, db_obj: Project, obj_in: Dict[str, Any]) -> Project:
+    for field, value in obj_in.items():
+        setattr(db_obj, field, value)
+    db.add(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
+    return db_obj
+
+
+async def remove(db: AsyncSession, *, db_obj: Project) -> Project:
+    await search_index.remove_project(db, db_obj.id)
+    await db.delete(db_obj)
+    await db.commit()
+    return db_obj
+
+
+def file_version(file_obj: Any) -> tuple:
+    """Version tuple of a loaded file or a ``get_file_versions`` row"""
+    return tuple(getattr(file_obj, column.key) for column in FILE_VERSION_COLUMNS)
+
+
+async def get_file_versions(db: AsyncSession, *, project_id: int) -> List[tuple]:
+    """Version tuples of every file in a project, ordered by id, without contents"""
+    result = await db.execute(
+        select(*FILE_VERSION_COLUMNS)
+        .where(ProjectFile.project_id == project_id)
+        .order_by(ProjectFile.id)
+    )
+    return [file_version(row) for row in result.all()]
+
+
+async def get_file(db: AsyncSession, *, project_id: int, file_id: int) -> Optional[ProjectFile]:
+    result = await db.execute(
+        select(ProjectFile).where(
+            ProjectFile.id == file_id,
+            ProjectFile.project_id == project_id
+        )
+    )
+    file_obj = result.scalars().first()
+    if file_obj:
+        await load_contents([file_obj])
+    return file_obj
+
+
+async def get_file_metadata(db: AsyncSession, *, project_id: int, file_id: int) -> Optional[ProjectFile]:
+    """A single file with the content column left unloaded"""
+    result = await db.execute(
+        select(ProjectFile)
+        .options(defer(ProjectFile.inline_content, raiseload=True))
+        .where(ProjectFile.id == file_id, ProjectFile.project_id == project_id)
+    )
+    return result.scalars().first()
+
+
+async def read_content(db: AsyncSession, *, file_obj: ProjectFile) -> str:
+    """Body of a file loaded by ``get_file_metadata``, inline or from the blob store"""
+    result = await db.execute(select(ProjectFile.inline_content).where(ProjectFile.id == file_obj.id))
+    content = result.scalar()
+    if content is None and file_obj.content_hash is not None:
+        if blob_store is None:
+            raise BlobStoreNotConfigured(file_obj.content_hash)
+        content = (await blob_store.get(file_obj.content_hash)).decode("utf-8")
+    return content or ""
+
+
+async def get_manifest(db: AsyncSession, *, project_id: int) -> List[ProjectFile]:
+    """All files in a project with the content column left unloaded"""
+    result = await db.execute(
+        select(ProjectFile)
+        .options(defer(ProjectFile.inline_content, raiseload=True))
+        .where(ProjectFile.project_id == project_id)
+        .order_by(ProjectFile.id)
+    )
+    return list(result.scalars().all())
+
+
+async def get_files(db: AsyncSession, *, project_id: int, file_ids: List[int]) -> List[ProjectFile]:
+    result = await db.execute(
+        select(ProjectFile)
+        .where(ProjectFile.project_id == project_id, ProjectFile.id.in_(file_ids))
+        .order_by(ProjectFile.id)
+    )
+    files = list(result.scalars().all())
+    await load_contents(files)
+    return files
+
+
+async def create_file(db: AsyncSession, *, obj_in: Dict[str, Any], project_id: int) -> ProjectFile:
+    db_obj = ProjectFile(**await _store_content(obj_in), project_id=project_id)
+    db.add(db_obj)
+    await db.flush()
+    await search_index.index_files(db, [file_document(db_obj, obj_in.get("content"))])
+    await db.commit()
+    await db.refresh(db_obj)
+    if "content" in obj_in:
+        db_obj.set_loaded_content(obj_in["content"])
+    return db_obj
+
+
+async def update_file(db: AsyncSession, *, db_obj: ProjectFile, obj_in: Dict[str, Any]) -> ProjectFile:
+    for field, value in (await _store_content(obj_in)).items():
+        setattr(db_obj, field, value)
+    db.add(db_obj)
+    if obj_in.keys() & {"content", "path", "file_type"}:
+        document = file_document(db_obj, obj_in.get("content"))
+        if "content" not in obj_in:
+            document["content"] = None  # metadata only; keep the indexed body
+        await search_index.index_files(db, [document])
+    await db.commit()
+    await db.refresh(db_obj)
+    if "content" in obj_in:
+        db_obj.set_loaded_content(obj_in["content"])
+    return db_obj
+
+
+async def update_file_content_if_unchanged(
+    db: AsyncSession, *, db_obj: ProjectFile, base_hash: Optional[str], content: str
+) -> bool:
+    """
+    Compare-and-set the file body: only write if the stored hash still
+    equals ``base_hash``. Returns False when another write got there first.
+    """
+    values = await _store_content({"content": content})
+    hash_matches = (
+        ProjectFile.content_hash.is_(None) if base_hash is None
+        else ProjectFile.content_hash == base_hash
+    )
+    result = await db.execute(
+        sql_update(ProjectFile)
+        .where(ProjectFile.id == db_obj.id, hash_matches)
+        .values({getattr(ProjectFile, field): value for field, value in values.items()})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        return False
+    await search_index.index_files(db, [file_document(db_obj, content)])
+    await db.commit()
+    await db.refresh(db_obj)
+    db_obj.set_loaded_content(content)
+    return True
+
+
+def _upsert_statement(db: AsyncSession):
+    """Multi-row file INSERT that updates the file already at the same path"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql_insert(ProjectFile)
+    elif dialect == "sqlite":
+        statement = sqlite_insert(ProjectFile)
+    else:
+        return sql_insert(ProjectFile)
+    return statement.on_conflict_do_update(
+        index_elements=[ProjectFile.project_id, ProjectFile.path],
+        set_={
+            column: statement.excluded[column]
+            for column in ("name", "file_type", "content", "size", "content_hash")
+        },
+    )
+
+
+async def bulk_sync_files(
+    db: AsyncSession, *, project_id: int, upserts: List[Dict[str, Any]], delete_paths: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Create, update and delete many files of one project in one transaction.
+
+    Upserts are matched to existing files by path and only carry the fields
+    being set. Existing rows are looked up with one query, new rows go in
+    with one multi-row INSERT, changed rows with one bulk UPDATE and
+    deletions with one DELETE. The INSERT is ``ON CONFLICT (project_id,
+    path) DO UPDATE``, so a path created by a concurrent sync since the
+    lookup is overwritten rather than duplicated. Returns a result entry
+    per path.
+    """
+    paths = [item["path"] for item in upserts] + list(delete_paths)
+    existing: Dict[str, Any] = {}
+    if paths:
+        result = await db.execute(
+            select(*SYNC_COMPARED_COLUMNS)
+            .where(ProjectFile.project_id == project_id, ProjectFile.path.in_(paths))
+        )
+        existing = {row.path: row._mapping for row in result.all()}
+
+    semaphore = asyncio.Semaphore(BLOB_IO_CONCURRENCY)
+
+    async def store(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await _store_content(item)
+
+    stored = await asyncio.gather(*(store(item) for item in upserts))
+
+    results: List[Dict[str, Any]] = []
+    inserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    documents: List[Dict[str, Any]] = []
+    for item, values in zip(upserts, stored):
+        row = existing.get(item["path"])
+        if row is None:
+            inserts.append({
+                "name": posixpath.basename(item["path"]) or item["path"],
+                "file_type": None,
+                "inline_content": None,
+                "size": None,
+                "content_hash": None,
+                **values,
+                "project_id": project_id,
+            })
+            continue
+        # A field this lookup did not load counts as changed
+        if all(field in row and row[field] == value
+               for field, value in values.items() if field not in SYNC_DERIVED_FIELDS):
+            results.append({"path": row["path"], "status": "unchanged", "id": row["id"],
+                            "content_hash": row["content_hash"]})
+            continue
+        updates.append({**values, "id": row["id"]})
+        documents.append({
+            "id": row["id"],
+            "project_id": project_id,
+            "path": row["path"],
+            "file_type": values.get("file_type", row["file_type"]),
+            "content": (item["content"] or "") if "content" in item else None,
+        })
+        results.append({"path": row["path"], "status": "updated", "id": row["id"],
+                        "content_hash": values.get("content_hash", row["content_hash"])})
+
+    if inserts:
+        # executemany plus one lookup batches on every dialect, unlike
+        # RETURNING with guaranteed ordering
+        await db.execute(_upsert_statement(db), inserts)
+        result = await db.execute(
+            select(ProjectFile.id, ProjectFile.path).where(
+                ProjectFile.project_id == project_id,
+                ProjectFile.path.in_([values["path"] for values in inserts])
+            )
+        )
+        new_ids = {path: file_id for file_id, path in result.all()}
+        bodies = {item["path"]: item.get("content") for item in upserts}
+        for values in inserts:
+            results.append({"path": values["path"], "status": "created", "id": new_ids.get(values["path"]),
+                            "content_hash": values["content_hash"]})
+            documents.append({
+                "id": new_ids.get(values["path"]),
+                "project_id": project_id,
+                "path": values["path"],
+                "file_type": values["file_type"],
+                "content": bodies[values["path"]] or "",
+            })
+    if updates:
+        await db.execute(sql_update(ProjectFile), updates)
+    if delete_paths:
+        await db.execute(
+            sql_delete(ProjectFile)
+            .where(ProjectFile.project_id == project_id, ProjectFile.path.in_(delete_paths))
+            .execution_options(synchronize_session=False)
+        )
+        for path in delete_paths:
+            row = existing.get(path)
+            results.append({"path": path, "status": "deleted" if row else "not_found",
+                            "id": row["id"] if row else None, "content_hash": None})
+        await search_index.remove_files(db, [existing[path]["id"] for path in delete_paths if path in existing])
+    if documents:
+        await search_index.index_files(db, documents)
+    await db.commit()
+    return results
+
+
+async def remove_file(db: AsyncSession, *, db_obj: ProjectFile) -> ProjectFile:
+    await search_index.remove_files(db, [db_obj.id])
+    await db.delete(db_obj)
+    await db.commit()
+    return db_obj
@@ -1,68 +1,79 @@
 from typing import Any, Dict, Optional, Union
-from sqlalchemy.orm import Session
-from app.core.security import get_password_hash, verify_password
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.hashing import password_hasher
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 
-def get(db: Session, id: Any) -> Optional[User]:
-    return db.query(User).filter(User.id == id).first()
+async def get(db: AsyncSession, id: Any) -> Optional[User]:
+    return await db.get(User, id)
 
 
-def get_by_email(db: Session, *, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+async def get_by_email(db: AsyncSession, *, email: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-def get_multi(db: Session, *, skip: int = 0, limit: int = 100) -> list[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+async def get_multi(
+    db: AsyncSession, *, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> list[User]:
+    """Page by offset, or by keyset on id when ``after_id`` is given"""
+    query = select(User).order_by(User.id)
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query.limit(limit))
+    return list(result.scalars().all())
 
 
-def create(db: Session, *, obj_in: UserCreate) -> User:
+async def create(db: AsyncSession, *, obj_in: UserCreate) -> User:
     db_obj = User(
         email=obj_in.email,
-        hashed_password=get_password_hash(obj_in.password),
+        hashed_password=await password_hasher.hash(obj_in.password),
         full_name=obj_in.full_name,
         is_superuser=False,
     )
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
     return db_obj
 
 
-def update(db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]) -> User:
+async def update(db: AsyncSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]) -> User:
     if isinstance(obj_in, dict):
         update_data = obj_in
     else:
         update_data = obj_in.dict(exclude_unset=True)
-    
+
     if "password" in update_data:
-        hashed_password = get_password_hash(update_data["password"])
+        hashed_password = await password_hasher.hash(update_data["password"])
         del update_data["password"]
         update_data["hashed_password"] = hashed_password
-    
+
     for field, value in update_data.items():
         if hasattr(db_obj, field):
             setattr(db_obj, field, value)
-    
+
     db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
+    await db.commit()
+    await db.refresh(db_obj)
     return db_obj
 
 
-def remove(db: Session, *, id: int) -> User:
-    obj = db.query(User).get(id)
-    db.delete(obj)
-    db.commit()
+async def remove(db: AsyncSession, *, id: int) -> User:
+    obj = await db.get(User, id)
+    await db.delete(obj)
+    await db.commit()
     return obj
 
 
-def authenticate(db: Session, *, email: str, password: str) -> Optional[User]:
-    user = get_by_email(db, email=email)
+async def authenticate(db: AsyncSession, *, email: str, password: str) -> Optional[User]:
+    user = await get_by_email(db, email=email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
 
@@ -72,4 +83,4 @@ def is_active(user: User) -> bool:
 
 
 def is_superuser(user: User) -> bool:
-    return user.is_superuser 
\ No newline at end of file
+    return user.is_superuser
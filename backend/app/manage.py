@@ -0,0 +1,134 @@
+"""
+One-shot management commands for deploys: schema migrations and bootstrap.
+
+    python -m app.manage migrate [--revision head]
+    python -m app.manage create-superuser
+    python -m app.manage bootstrap
+    python -m app.manage cold-start [--runs 5]
+
+Run from ``backend/`` with the usual settings in the environment or .env.
+``bootstrap`` is ``migrate`` followed by ``create-superuser``; run it once
+per deploy, before starting the API workers, which no longer touch the
+schema or the superuser themselves. ``cold-start`` starts the app in fresh
+interpreters and reports how long import and lifespan startup take.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+from app.core.database import async_engine, engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Schema of the original models; older create_all databases are stamped here, then upgraded
+BASELINE_REVISION = "0001"
+# Serializes concurrent migrate runs on Postgres; any constant shared by all runs
+MIGRATION_LOCK_ID = 7_301_042
+
+COLD_START_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(run())
+print(json.dumps({"import": imported - start, "startup": ready - imported}))
+"""
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def migrate(revision: str = "head") -> None:
+    """Upgrade the schema, adopting databases built by create_all"""
+    config = alembic_config()
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Released at commit; a second deploy waits rather than racing
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "users" in tables:
+            print(f"Existing schema has no migration history, stamping revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+
+
+async def create_superuser() -> None:
+    from app.core.hashing import password_hasher
+    from app.core.security import create_first_superuser
+
+    try:
+        await create_first_superuser()
+    finally:
+        password_hasher.shutdown()
+        await async_engine.dispose()
+
+
+def measure_cold_start(runs: int) -> Dict[str, List[float]]:
+    """Seconds spent importing ``main`` and in lifespan startup, per fresh interpreter"""
+    timings: Dict[str, List[float]] = {"import": [], "startup": [], "process": []}
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", COLD_START_SCRIPT],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(f"App failed to start:\n{result.stderr}")
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        timings["import"].append(phases["import"])
+        timings["startup"].append(phases["startup"])
+        timings["process"].append(elapsed)
+    return timings
+
+
+def cold_start(runs: int) -> None:
+    timings = measure_cold_start(runs)
+    print(f"{'phase':10} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for phase, values in timings.items():
+        print(f"{phase:10} {statistics.median(values) * 1000:10.1f} "
+              f"{min(values) * 1000:8.1f} {max(values) * 1000:8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="apply schema migrations")
+    migrate_parser.add_argument("--revision", default="head")
+    commands.add_parser("create-superuser", help="create FIRST_SUPERUSER if missing")
+    commands.add_parser("bootstrap", help="migrate, then create the superuser")
+    cold_start_parser = commands.add_parser("cold-start", help="measure app import and startup time")
+    cold_start_parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate(args.revision)
+    elif args.command == "create-superuser":
+        asyncio.run(create_superuser())
+    elif args.command == "bootstrap":
+        migrate()
+        asyncio.run(create_superuser())
+    elif args.command == "cold-start":
+        cold_start(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 from .user import User
-from .project import Project, ProjectFile
+from .project import Project, ProjectFile, ProjectFileSearch
+from .rate_limit import RateLimitBucket
+from .stripe_event import StripeEvent
 
-__all__ = ["User", "Project", "ProjectFile"] 
\ No newline at end of file
+__all__ = ["User", "Project", "ProjectFile", "ProjectFileSearch", "RateLimitBucket", "StripeEvent"] 
\ No newline at end of file
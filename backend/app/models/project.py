@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from typing import Optional
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Index, DDL, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -6,6 +7,10 @@ from app.core.database import Base
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        # Keyset pagination of a user's projects
+        Index("ix_projects_owner_id_id", "owner_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -32,13 +37,22 @@ class Project(Base):
 
 class ProjectFile(Base):
     __tablename__ = "project_files"
+    __table_args__ = (
+        # Listing and keyset paging files within a project
+        Index("ix_project_files_project_id_id", "project_id", "id"),
+        # One file per path; bulk sync upserts against it
+        Index("uq_project_files_project_id_path", "project_id", "path", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     name = Column(String, nullable=False)
     path = Column(String, nullable=False)
-    content = Column(Text, nullable=True)
+    # Body stored in the row itself; null for files kept in the blob store
+    inline_content = Column("content", Text, nullable=True)
     file_type = Column(String, nullable=True)  # .py, .js, .tsx, etc.
+    size = Column(Integer, nullable=True)  # UTF-8 byte length of content
+    content_hash = Column(String(64), nullable=True, index=True)  # hex SHA-256, blob address
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -47,5 +61,49 @@ class ProjectFile(Base):
     # Relationships
     project = relationship("Project", back_populates="files")
     
+    @property
+    def content(self) -> Optional[str]:
+        """File body; blob-backed files are populated by crud_project.load_contents"""
+        if "_loaded_content" in self.__dict__:
+            return self.__dict__["_loaded_content"]
+        return self.inline_content
+    
+    def set_loaded_content(self, content: Optional[str]) -> None:
+        self.__dict__["_loaded_content"] = content
+    
     def __repr__(self):
-        return f"<ProjectFile(id={self.id}, name='{self.name}', project_id={self.project_id})>" 
\ No newline at end of file
+        return f"<ProjectFile(id={self.id}, name='{self.name}', project_id={self.project_id})>" 
+
+
+class ProjectFileSearch(Base):
+    """Searchable text of each file, maintained by app.search on Postgres"""
+    __tablename__ = "project_file_search"
+    __table_args__ = (
+        # Word search; app.search.postgres queries this exact expression
+        Index(
+            "ix_project_file_search_tsv", text("to_tsvector('simple', terms)"),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Substring and symbol search; ILIKE '%...%' uses this on Postgres
+        Index(
+            "ix_project_file_search_body_trgm", "body",
+            postgresql_using="gin", postgresql_ops={"body": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    file_id = Column(Integer, ForeignKey("project_files.id", ondelete="CASCADE"), primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    path = Column(String, nullable=False)
+    file_type = Column(String, nullable=True)
+    # Copy of the body so blob-backed files are searchable too
+    body = Column(Text, nullable=False, default="")
+    # Path and body run through app.search.base.tokenize, so identifiers are
+    # split into their snake/camel-case words exactly as the memory index does
+    terms = Column(Text, nullable=False, default="")
+
+
+event.listen(
+    ProjectFileSearch.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,20 @@
+from sqlalchemy import Boolean, Column, Float, Index, String
+from app.core.database import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket state shared by every worker when RATE_LIMIT_BACKEND=database"""
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = (
+        # Pruning buckets that have refilled
+        Index("ix_rate_limit_buckets_full_at", "full_at"),
+    )
+
+    key = Column(String, primary_key=True)  # route class and user id or client IP
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # unix seconds of the last take
+    full_at = Column(Float, nullable=False)  # unix seconds when the bucket is full again
+    allowed = Column(Boolean, nullable=False)  # outcome of the last take
+    
+    def __repr__(self):
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens})>"
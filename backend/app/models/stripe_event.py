@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class StripeEvent(Base):
+    """Inbox of verified Stripe webhook events, processed by the background worker"""
+    __tablename__ = "stripe_events"
+    __table_args__ = (
+        # Finding due events
+        Index("ix_stripe_events_status_next_attempt_at", "status", "next_attempt_at"),
+        # Per-customer ordering
+        Index("ix_stripe_events_ordering_key_created", "ordering_key", "stripe_created"),
+    )
+
+    id = Column(String, primary_key=True)  # Stripe event id; redeliveries collide here
+    type = Column(String, nullable=False)
+    ordering_key = Column(String, nullable=False)  # Stripe customer id, else the event id
+    stripe_created = Column(Integer, nullable=False)  # event.created, unix seconds
+    payload = Column(Text, nullable=False)  # verified JSON body as received
+    
+    # Processing state: pending, processing, done, failed
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    
+    # Timestamps
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<StripeEvent(id='{self.id}', type='{self.type}', status='{self.status}')>"
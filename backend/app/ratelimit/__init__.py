@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.ratelimit.base import RateLimiter, RateLimitResult, RatePolicy
+from app.ratelimit.database import DatabaseRateLimiter
+from app.ratelimit.memory import InMemoryRateLimiter
+
+
+def create_rate_limiter() -> Optional[RateLimiter]:
+    """Build the configured backend; ``auto`` shares buckets through Postgres"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    backend = settings.RATE_LIMIT_BACKEND
+    if backend == "auto":
+        backend = "database" if settings.DATABASE_URL.startswith("postgres") else "memory"
+    if backend == "database":
+        return DatabaseRateLimiter(async_engine)
+    if backend == "memory":
+        return InMemoryRateLimiter()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'")
+
+
+def create_rate_policies() -> Dict[str, RatePolicy]:
+    """Route classes and their limits"""
+    return {
+        "auth": RatePolicy.parse("auth", settings.RATE_LIMIT_AUTH),
+        "write": RatePolicy.parse("write", settings.RATE_LIMIT_WRITE),
+        "payments": RatePolicy.parse("payments", settings.RATE_LIMIT_PAYMENTS),
+    }
+
+
+rate_limiter = create_rate_limiter()
+rate_policies = create_rate_policies()
+
+__all__ = [
+    "DatabaseRateLimiter",
+    "InMemoryRateLimiter",
+    "RateLimitResult",
+    "RateLimiter",
+    "RatePolicy",
+    "create_rate_limiter",
+    "create_rate_policies",
+    "rate_limiter",
+    "rate_policies",
+]
@@ -0,0 +1,72 @@
+import math
+from dataclasses import dataclass
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class RatePolicy:
+    """``capacity`` requests in a burst, refilled evenly over ``period`` seconds"""
+
+    name: str
+    capacity: int
+    period: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, name: str, value: str) -> "RatePolicy":
+        """Parse ``"<requests>/<seconds>"``, e.g. ``"10/60"``"""
+        try:
+            count, period = value.split("/")
+            policy = cls(name=name, capacity=int(count), period=float(period))
+        except ValueError:
+            raise ValueError(f"Rate limit for '{name}' must look like '10/60', got '{value}'")
+        if policy.capacity <= 0 or policy.period <= 0:
+            raise ValueError(f"Rate limit for '{name}' must be positive, got '{value}'")
+        return policy
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: int  # seconds until the bucket is full again
+    retry_after: int  # seconds until the next request would be allowed
+
+    def headers(self, policy: RatePolicy) -> Dict[str, str]:
+        """``RateLimit-*`` headers (IETF httpapi-ratelimit-headers draft)"""
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset_after),
+            "RateLimit-Policy": f"{policy.capacity};w={int(policy.period)}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def bucket_result(policy: RatePolicy, allowed: bool, tokens: float, cost: float = 1) -> RateLimitResult:
+    """Describe a bucket left holding ``tokens`` after a take"""
+    rate = policy.refill_per_second
+    return RateLimitResult(
+        allowed=allowed,
+        limit=policy.capacity,
+        remaining=max(int(math.floor(tokens)), 0),
+        reset_after=int(math.ceil(max(policy.capacity - tokens, 0) / rate)),
+        retry_after=0 if allowed else max(int(math.ceil((cost - tokens) / rate)), 1),
+    )
+
+
+class RateLimiter:
+    """Token buckets keyed by arbitrary strings, one refill policy per call"""
+
+    async def take(self, key: str, policy: RatePolicy, cost: float = 1) -> RateLimitResult:
+        """Remove ``cost`` tokens from the bucket if it holds that many"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, object]:
+        return {}
@@ -0,0 +1,92 @@
+import logging
+import time
+from typing import Dict
+
+from sqlalchemy import case, delete, literal
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.models.rate_limit import RateLimitBucket
+from app.ratelimit.base import RateLimiter, RateLimitResult, RatePolicy, bucket_result
+
+logger = logging.getLogger(__name__)
+
+# Buckets that have refilled are deleted at most this often
+PRUNE_INTERVAL_SECONDS = 300
+
+
+class DatabaseRateLimiter(RateLimiter):
+    """
+    Buckets in the ``rate_limit_buckets`` table, shared by every worker.
+
+    Each take is one ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` that
+    refills and debits the row atomically, so concurrent workers cannot both
+    spend the last token. Runs on its own connection outside the request's
+    transaction. If the database cannot be reached the request is let
+    through rather than failing on the limiter.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            self._insert = postgresql_insert
+        elif dialect == "sqlite":
+            self._insert = sqlite_insert
+        else:
+            raise ValueError(f"Database rate limiting does not support '{dialect}'")
+        self._pruned_at = 0.0
+        self.allowed = 0
+        self.limited = 0
+        self.errors = 0
+
+    def _take_statement(self, key: str, policy: RatePolicy, cost: float, now: float):
+        capacity = literal(float(policy.capacity))
+        rate = literal(policy.refill_per_second)
+        cost_value = literal(float(cost))
+        now_value = literal(now)
+        refilled_raw = RateLimitBucket.tokens + (now_value - RateLimitBucket.updated_at) * rate
+        refilled = case((refilled_raw > capacity, capacity), else_=refilled_raw)
+        remaining = case((refilled >= cost_value, refilled - cost_value), else_=refilled)
+
+        first_tokens = max(policy.capacity - cost, 0.0)
+        statement = self._insert(RateLimitBucket).values(
+            key=key,
+            tokens=first_tokens,
+            updated_at=now,
+            full_at=now + (policy.capacity - first_tokens) / policy.refill_per_second,
+            allowed=cost <= policy.capacity,
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[RateLimitBucket.key],
+            set_={
+                "tokens": remaining,
+                "updated_at": now_value,
+                "full_at": now_value + (capacity - remaining) / rate,
+                "allowed": refilled >= cost_value,
+            },
+        ).returning(RateLimitBucket.tokens, RateLimitBucket.allowed)
+
+    async def take(self, key: str, policy: RatePolicy, cost: float = 1) -> RateLimitResult:
+        now = time.time()
+        try:
+            async with self.engine.begin() as conn:
+                tokens, allowed = (await conn.execute(self._take_statement(key, policy, cost, now))).one()
+                if now - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                    self._pruned_at = now
+                    # A full bucket behaves exactly like a missing one
+                    await conn.execute(delete(RateLimitBucket).where(RateLimitBucket.full_at < now))
+        except (SQLAlchemyError, OSError) as e:
+            self.errors += 1
+            logger.warning("Rate limiter unavailable, allowing request: %s", e)
+            return bucket_result(policy, True, float(policy.capacity), cost)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return bucket_result(policy, bool(allowed), tokens, cost)
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": "database", "allowed": self.allowed, "limited": self.limited, "errors": self.errors}
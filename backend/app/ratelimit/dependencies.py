@@ -0,0 +1,57 @@
+from typing import Any, Callable
+
+from fastapi import Depends, HTTPException, Request, Response
+
+from app import ratelimit
+from app.core.config import settings
+from app.ratelimit.base import RatePolicy
+
+
+def client_ip(request: Request) -> str:
+    """
+    The caller's address; X-Forwarded-For is only trusted when configured.
+
+    Each proxy appends the address it received the request from, so the
+    entry ``RATE_LIMIT_PROXY_HOPS`` from the right was written by the
+    outermost trusted proxy. Entries left of it are whatever the client
+    sent and would let it pick a fresh bucket per request.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        forwarded = [entry for entry in forwarded if entry]
+        if forwarded:
+            return forwarded[-min(max(settings.RATE_LIMIT_PROXY_HOPS, 1), len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(key: str, policy: RatePolicy, response: Response) -> None:
+    """Take a token for ``key``, raising 429 when the bucket is empty"""
+    # Looked up per call so the module-global limiter can be swapped
+    limiter = ratelimit.rate_limiter
+    if limiter is None:
+        return
+    result = await limiter.take(f"{policy.name}:{key}", policy)
+    headers = result.headers(policy)
+    if not result.allowed:
+        raise HTTPException(status_code=429, detail="Too many requests, please slow down", headers=headers)
+    response.headers.update(headers)
+
+
+def limit_by_ip(route_class: str) -> Callable:
+    """Dependency limiting a route class per client IP (for anonymous routes)"""
+    policy = ratelimit.rate_policies[route_class]
+
+    async def dependency(request: Request, response: Response) -> None:
+        await enforce(f"ip:{client_ip(request)}", policy, response)
+
+    return dependency
+
+
+def limit_by_user(route_class: str, user_dependency: Callable) -> Callable:
+    """Dependency limiting a route class per authenticated user id"""
+    policy = ratelimit.rate_policies[route_class]
+
+    async def dependency(response: Response, current_user: Any = Depends(user_dependency)) -> None:
+        await enforce(f"user:{current_user.id}", policy, response)
+
+    return dependency
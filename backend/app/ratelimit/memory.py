@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from app.ratelimit.base import RateLimiter, RateLimitResult, RatePolicy, bucket_result
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Buckets held in process, so each worker enforces the limits on its own.
+
+    Good for a single worker or development; with several uvicorn workers
+    the effective limit is multiplied by the worker count. Least recently
+    used buckets are dropped past ``max_keys``; a dropped bucket is simply
+    full again.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    async def take(self, key: str, policy: RatePolicy, cost: float = 1) -> RateLimitResult:
+        # No awaits below, so the read-modify-write cannot interleave
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(policy.capacity), now))
+        tokens = min(float(policy.capacity), tokens + (now - updated_at) * policy.refill_per_second)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+            self.allowed += 1
+        else:
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return bucket_result(policy, allowed, tokens, cost)
+
+    def stats(self) -> Dict[str, object]:
+        return {"backend": "memory", "keys": len(self._buckets), "allowed": self.allowed, "limited": self.limited}
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional
+from datetime import datetime
 
 
 class UserLogin(BaseModel):
@@ -58,7 +59,7 @@ class UserResponse(BaseModel):
     oauth_provider: Optional[str] = None
     email_verified: bool
     subscription_tier: str
-    created_at: str
+    created_at: datetime
 
     class Config:
         from_attributes = True
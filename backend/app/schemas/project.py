@@ -1,5 +1,5 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from datetime import datetime
 
 
@@ -59,10 +59,19 @@ class ProjectFileUpdate(BaseModel):
     content: Optional[str] = None
     file_type: Optional[str] = None
 
+    @validator('name', 'path')
+    def not_null(cls, v):
+        # Omit the field to leave it unchanged; the columns are not nullable
+        if v is None:
+            raise ValueError('may be omitted but not null')
+        return v
+
 
 class ProjectFileInDBBase(ProjectFileBase):
     id: int
     project_id: int
+    size: Optional[int] = None
+    content_hash: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -74,5 +83,84 @@ class ProjectFile(ProjectFileInDBBase):
     pass
 
 
+class ProjectFileManifestEntry(BaseModel):
+    """File metadata without the content body"""
+    id: int
+    project_id: int
+    name: str
+    path: str
+    file_type: Optional[str] = None
+    size: Optional[int] = None
+    content_hash: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProjectFileBatchRead(BaseModel):
+    file_ids: List[int]
+
+
+class ProjectFileUpsert(BaseModel):
+    path: str
+    name: Optional[str] = None  # defaults to the last path segment on create
+    content: Optional[str] = None
+    file_type: Optional[str] = None
+
+    @validator('name')
+    def name_not_null(cls, v):
+        if v is None:
+            raise ValueError('may be omitted but not null')
+        return v
+
+
+class ProjectFileBulkSync(BaseModel):
+    upserts: List[ProjectFileUpsert] = []
+    deletes: List[str] = []  # paths
+
+
+class ProjectFileBulkResult(BaseModel):
+    path: str
+    status: str  # created, updated, unchanged, deleted, not_found
+    id: Optional[int] = None
+    content_hash: Optional[str] = None
+
+
+class ProjectFileBulkSyncResponse(BaseModel):
+    results: List[ProjectFileBulkResult]
+
+
+class FilePatchHunk(BaseModel):
+    """Replace ``delete`` base lines starting at line ``start`` with ``insert``"""
+    start: int = Field(ge=0)
+    delete: int = Field(default=0, ge=0)
+    insert: str = ""
+
+
+class ProjectFilePatch(BaseModel):
+    base_hash: str  # content_hash the hunks were computed against
+    hunks: List[FilePatchHunk]
+    result_hash: Optional[str] = None  # optional check of the patched content
+
+
+class ProjectArchiveImportResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    skipped: List[str] = []  # unsafe paths, oversized or non-UTF-8 members
+
+
+class ProjectFileSearchHit(BaseModel):
+    file_id: int
+    project_id: int
+    path: str
+    file_type: Optional[str] = None
+    score: float
+    line: Optional[int] = None  # 1-based line of the snippet
+    snippet: str
+
+
 # Update forward references
 ProjectWithFiles.model_rebuild() 
\ No newline at end of file
@@ -0,0 +1,29 @@
+from app.core.config import settings
+from app.search.base import LANGUAGE_EXTENSIONS, SearchIndex, resolve_extensions
+from app.search.memory import InMemorySearchIndex
+from app.search.postgres import PostgresSearchIndex
+
+
+def create_search_index() -> SearchIndex:
+    """Build the configured backend; ``auto`` follows the database dialect"""
+    backend = settings.SEARCH_BACKEND
+    if backend == "auto":
+        backend = "postgres" if settings.DATABASE_URL.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresSearchIndex()
+    if backend == "memory":
+        return InMemorySearchIndex()
+    raise ValueError(f"Unknown SEARCH_BACKEND '{backend}'")
+
+
+search_index = create_search_index()
+
+__all__ = [
+    "InMemorySearchIndex",
+    "LANGUAGE_EXTENSIONS",
+    "PostgresSearchIndex",
+    "SearchIndex",
+    "create_search_index",
+    "resolve_extensions",
+    "search_index",
+]
@@ -0,0 +1,159 @@
+import re
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import ProjectFile
+
+# Language names accepted by the search filter, mapped to file_type values
+LANGUAGE_EXTENSIONS = {
+    "python": [".py", ".pyi"],
+    "javascript": [".js", ".jsx", ".mjs", ".cjs"],
+    "typescript": [".ts", ".tsx"],
+    "html": [".html", ".htm"],
+    "css": [".css", ".scss", ".sass", ".less"],
+    "json": [".json"],
+    "markdown": [".md", ".mdx"],
+    "yaml": [".yml", ".yaml"],
+    "go": [".go"],
+    "rust": [".rs"],
+    "java": [".java"],
+    "c": [".c", ".h"],
+    "cpp": [".cpp", ".cc", ".hpp", ".hh"],
+    "ruby": [".rb"],
+    "php": [".php"],
+    "sql": [".sql"],
+    "shell": [".sh", ".bash"],
+}
+
+SNIPPET_MAX_CHARS = 200
+# Files loaded per batch when rebuilding an index
+REBUILD_BATCH_SIZE = 200
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[0-9]+")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def split_identifier(word: str) -> List[str]:
+    """``getCurrentUser`` / ``get_current_user`` -> ``["get", "current", "user"]``"""
+    parts = []
+    for chunk in word.split("_"):
+        parts.extend(part.lower() for part in _CAMEL_PART.findall(chunk))
+    return parts
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Words and symbols of ``text``, lowercased.
+
+    Each identifier yields itself plus its snake/camel-case parts, so
+    ``get_current_user`` is found by searching for the symbol or any of
+    its words.
+    """
+    tokens = []
+    for word in _IDENTIFIER.findall(text):
+        lowered = word.lower()
+        tokens.append(lowered)
+        parts = split_identifier(word)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def document_terms(path: str, content: str) -> List[str]:
+    """Terms a file is found by: those of its path, then of its body"""
+    return tokenize(path) + tokenize(content)
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct words a query requires, with symbols split into their parts"""
+    terms: List[str] = []
+    for word in _IDENTIFIER.findall(query):
+        for term in split_identifier(word) or [word.lower()]:
+            if term not in terms:
+                terms.append(term)
+    return terms
+
+
+def resolve_extensions(languages: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Turn language names (or raw extensions like ``.py``) into file_type values"""
+    if not languages:
+        return None
+    extensions: List[str] = []
+    for language in languages:
+        language = language.strip().lower()
+        if language.startswith("."):
+            extensions.append(language)
+        else:
+            extensions.extend(LANGUAGE_EXTENSIONS.get(language, []))
+    return extensions
+
+
+def make_snippet(content: str, query: str, terms: List[str]) -> Tuple[Optional[int], str]:
+    """The first line matching the query (or failing that any term), 1-based"""
+    lowered_query = query.strip().lower()
+    fallback = None
+    for number, line in enumerate(content.splitlines(), start=1):
+        lowered = line.lower()
+        if lowered_query and lowered_query in lowered:
+            return number, line.strip()[:SNIPPET_MAX_CHARS]
+        if fallback is None and any(term in lowered for term in terms):
+            fallback = (number, line.strip()[:SNIPPET_MAX_CHARS])
+    return fallback or (None, content.strip()[:SNIPPET_MAX_CHARS])
+
+
+def file_document(file_obj: ProjectFile, content: Optional[str]) -> Dict[str, Any]:
+    return {
+        "id": file_obj.id,
+        "project_id": file_obj.project_id,
+        "path": file_obj.path,
+        "file_type": file_obj.file_type,
+        "content": content or "",
+    }
+
+
+async def iter_file_documents(db: AsyncSession) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Every file with its body, a batch at a time, from a server-side cursor"""
+    # crud_project imports this package to keep the index current
+    from app.crud.crud_project import load_contents
+
+    result = await db.stream(
+        select(ProjectFile).order_by(ProjectFile.id).execution_options(yield_per=REBUILD_BATCH_SIZE)
+    )
+    async for batch in result.scalars().partitions():
+        await load_contents(batch)
+        yield [file_document(file_obj, file_obj.content) for file_obj in batch]
+
+
+class SearchIndex:
+    """
+    Search over project file contents and paths.
+
+    Documents are dicts with ``id``, ``project_id``, ``path``, ``file_type``
+    and, when the body changed, ``content``. Writes are made inside the
+    caller's transaction and only become visible once it commits.
+    """
+
+    async def startup(self) -> None:
+        pass
+
+    async def index_files(self, db: AsyncSession, documents: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def remove_files(self, db: AsyncSession, file_ids: List[int]) -> None:
+        raise NotImplementedError
+
+    async def remove_project(self, db: AsyncSession, project_id: int) -> None:
+        raise NotImplementedError
+
+    async def search(
+        self, db: AsyncSession, query: str, *, project_ids: List[int],
+        extensions: Optional[List[str]] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Ranked hits with ``file_id``, ``project_id``, ``path``, ``file_type``, ``score``, ``line`` and ``snippet``"""
+        raise NotImplementedError
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """Re-index every file from project_files; returns the number indexed"""
+        raise NotImplementedError
@@ -0,0 +1,193 @@
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import AsyncSessionLocal
+from app.search.base import SearchIndex, document_terms, iter_file_documents, make_snippet, query_terms
+
+# Session.info key for index changes waiting on the transaction
+PENDING_SEARCH_CHANGES = "pending_search_changes"
+
+# BM25 parameters, plus bonuses for an exact substring and a path match
+BM25_K1 = 1.2
+BM25_B = 0.75
+PHRASE_BONUS = 2.0
+PATH_BONUS = 1.0
+
+
+class InMemorySearchIndex(SearchIndex):
+    """
+    Inverted index held in process, for SQLite and development.
+
+    Built from the database at startup and kept current by applying each
+    committed transaction's changes. Holds every file body in memory and is
+    per worker, so production deployments should use Postgres.
+    """
+
+    def __init__(self):
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._by_project: Dict[int, Set[int]] = {}
+        self._total_length = 0
+
+    def _add(self, document: Dict[str, Any]) -> None:
+        existing = self._docs.get(document["id"])
+        content = document.get("content")
+        if content is None:
+            content = existing["content"] if existing else ""
+        self._discard(document["id"])
+        terms = Counter(document_terms(document["path"], content))
+        self._docs[document["id"]] = {
+            "project_id": document["project_id"],
+            "path": document["path"],
+            "file_type": document.get("file_type"),
+            "content": content,
+            "terms": terms,
+            "length": sum(terms.values()),
+        }
+        for term, count in terms.items():
+            self._postings.setdefault(term, {})[document["id"]] = count
+        self._by_project.setdefault(document["project_id"], set()).add(document["id"])
+        self._total_length += self._docs[document["id"]]["length"]
+
+    def _discard(self, file_id: int) -> None:
+        doc = self._docs.pop(file_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(file_id, None)
+                if not postings:
+                    del self._postings[term]
+        project_docs = self._by_project.get(doc["project_id"])
+        if project_docs is not None:
+            project_docs.discard(file_id)
+            if not project_docs:
+                del self._by_project[doc["project_id"]]
+        self._total_length -= doc["length"]
+
+    def apply(self, action: str, payload: Any) -> None:
+        if action == "index":
+            for document in payload:
+                self._add(document)
+        elif action == "remove":
+            for file_id in payload:
+                self._discard(file_id)
+        elif action == "remove_project":
+            for file_id in list(self._by_project.get(payload, ())):
+                self._discard(file_id)
+
+    def _stage(self, db: AsyncSession, action: str, payload: Any) -> None:
+        db.info.setdefault(PENDING_SEARCH_CHANGES, []).append((self, action, payload))
+
+    async def startup(self) -> None:
+        async with AsyncSessionLocal() as db:
+            await self.rebuild(db)
+
+    async def index_files(self, db: AsyncSession, documents: List[Dict[str, Any]]) -> None:
+        self._stage(db, "index", documents)
+
+    async def remove_files(self, db: AsyncSession, file_ids: List[int]) -> None:
+        self._stage(db, "remove", file_ids)
+
+    async def remove_project(self, db: AsyncSession, project_id: int) -> None:
+        self._stage(db, "remove_project", project_id)
+
+    async def search(
+        self, db: AsyncSession, query: str, *, project_ids: List[int],
+        extensions: Optional[List[str]] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        terms = query_terms(query)
+        needle = query.strip().lower()
+        if not terms and not needle:
+            return []
+        allowed = set(project_ids)
+        wanted_types = set(extensions) if extensions is not None else None
+
+        def visible(file_id: int) -> bool:
+            doc = self._docs[file_id]
+            return doc["project_id"] in allowed and (
+                wanted_types is None or doc["file_type"] in wanted_types
+            )
+
+        postings = [self._postings.get(term, {}) for term in terms]
+        candidates: Set[int] = set()
+        if terms and all(postings):
+            # Intersect starting from the rarest term
+            postings.sort(key=len)
+            candidates = {file_id for file_id in postings[0] if visible(file_id)}
+            for term_postings in postings[1:]:
+                candidates &= term_postings.keys()
+        if len(candidates) < limit and needle:
+            # Substrings that are not whole words, like the trigram path on Postgres
+            for project_id in allowed:
+                for file_id in self._by_project.get(project_id, ()):
+                    if file_id not in candidates and visible(file_id):
+                        doc = self._docs[file_id]
+                        if needle in doc["content"].lower() or needle in doc["path"].lower():
+                            candidates.add(file_id)
+
+        doc_count = len(self._docs) or 1
+        average_length = (self._total_length / doc_count) or 1.0
+        scored = []
+        for file_id in candidates:
+            doc = self._docs[file_id]
+            score = 0.0
+            for term in terms:
+                count = doc["terms"].get(term, 0)
+                if not count:
+                    continue
+                frequency = len(self._postings.get(term, ()))
+                idf = math.log(1 + (doc_count - frequency + 0.5) / (frequency + 0.5))
+                norm = count + BM25_K1 * (1 - BM25_B + BM25_B * doc["length"] / average_length)
+                score += idf * count * (BM25_K1 + 1) / norm
+            if needle and needle in doc["content"].lower():
+                score += PHRASE_BONUS
+            path = doc["path"].lower()
+            if any(term in path for term in terms):
+                score += PATH_BONUS
+            scored.append((score, file_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        hits = []
+        for score, file_id in scored[:limit]:
+            doc = self._docs[file_id]
+            line, snippet = make_snippet(doc["content"], query, terms)
+            hits.append({
+                "file_id": file_id,
+                "project_id": doc["project_id"],
+                "path": doc["path"],
+                "file_type": doc["file_type"],
+                "score": round(score, 4),
+                "line": line,
+                "snippet": snippet,
+            })
+        return hits
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        self._docs.clear()
+        self._postings.clear()
+        self._by_project.clear()
+        self._total_length = 0
+        count = 0
+        async for documents in iter_file_documents(db):
+            for document in documents:
+                self._add(document)
+            count += len(documents)
+        return count
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_search_changes(session: Session) -> None:
+    for index, action, payload in session.info.pop(PENDING_SEARCH_CHANGES, ()):
+        index.apply(action, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_search_changes(session: Session) -> None:
+    session.info.pop(PENDING_SEARCH_CHANGES, None)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, delete, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.models.project import ProjectFileSearch
+from app.search.base import SearchIndex, document_terms, iter_file_documents, make_snippet, query_terms
+
+# Bonuses added to ts_rank_cd for an exact substring and a path match
+PHRASE_BONUS = 2.0
+PATH_BONUS = 1.0
+
+# Same expression as ix_project_file_search_tsv so word queries use the index
+search_vector = func.to_tsvector(literal_column("'simple'"), ProjectFileSearch.terms)
+
+
+class PostgresSearchIndex(SearchIndex):
+    """
+    Search backed by the ``project_file_search`` table.
+
+    Whole words go through a GIN index on ``to_tsvector('simple', terms)``,
+    where ``terms`` is the path and body pre-split by the same tokenizer as
+    the memory backend, so ``getCurrentUser`` and ``get_current_user`` are
+    both found by either spelling. Matches are ranked with ``ts_rank_cd``;
+    symbols and partial words fall back to ``ILIKE`` on a pg_trgm GIN index
+    over the raw body. Rows are written in the same transaction as the file
+    change they mirror.
+    """
+
+    async def index_files(self, db: AsyncSession, documents: List[Dict[str, Any]]) -> None:
+        with_content = [doc for doc in documents if doc.get("content") is not None]
+        metadata_only = [doc for doc in documents if doc.get("content") is None]
+        if metadata_only:
+            # A renamed path changes the terms, which are rebuilt from the stored body
+            result = await db.execute(
+                select(ProjectFileSearch.file_id, ProjectFileSearch.body)
+                .where(ProjectFileSearch.file_id.in_([doc["id"] for doc in metadata_only]))
+            )
+            bodies = dict(result.all())
+            with_content += [
+                {**doc, "content": bodies[doc["id"]]} for doc in metadata_only if doc["id"] in bodies
+            ]
+        if with_content:
+            statement = insert(ProjectFileSearch)
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ProjectFileSearch.file_id],
+                    set_={
+                        "project_id": statement.excluded.project_id,
+                        "path": statement.excluded.path,
+                        "file_type": statement.excluded.file_type,
+                        "body": statement.excluded.body,
+                        "terms": statement.excluded.terms,
+                    },
+                ),
+                [
+                    {"file_id": doc["id"], "project_id": doc["project_id"], "path": doc["path"],
+                     "file_type": doc.get("file_type"), "body": doc["content"],
+                     "terms": " ".join(document_terms(doc["path"], doc["content"]))}
+                    for doc in with_content
+                ],
+            )
+
+    async def remove_files(self, db: AsyncSession, file_ids: List[int]) -> None:
+        if file_ids:
+            await db.execute(delete(ProjectFileSearch).where(ProjectFileSearch.file_id.in_(file_ids)))
+
+    async def remove_project(self, db: AsyncSession, project_id: int) -> None:
+        await db.execute(delete(ProjectFileSearch).where(ProjectFileSearch.project_id == project_id))
+
+    async def search(
+        self, db: AsyncSession, query: str, *, project_ids: List[int],
+        extensions: Optional[List[str]] = None, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        terms = query_terms(query)
+        needle = query.strip()
+        if not (terms or needle) or not project_ids:
+            return []
+        # Terms are plain words after query_terms, so joining them is safe
+        tsquery = func.to_tsquery(literal_column("'simple'"), literal(" & ".join(terms)))
+        phrase = ProjectFileSearch.body.icontains(needle, autoescape=True)
+        in_path = ProjectFileSearch.path.icontains(needle, autoescape=True)
+        score = (
+            func.ts_rank_cd(search_vector, tsquery)
+            + case((phrase, PHRASE_BONUS), else_=0.0)
+            + case((in_path, PATH_BONUS), else_=0.0)
+        ).label("score")
+
+        statement = (
+            select(ProjectFileSearch, score)
+            .options(defer(ProjectFileSearch.terms))
+            .where(
+                ProjectFileSearch.project_id.in_(project_ids),
+                or_(search_vector.op("@@")(tsquery), phrase, in_path),
+            )
+            .order_by(score.desc(), ProjectFileSearch.file_id)
+            .limit(limit)
+        )
+        if extensions is not None:
+            statement = statement.where(ProjectFileSearch.file_type.in_(extensions))
+
+        hits = []
+        for row, row_score in (await db.execute(statement)).all():
+            line, snippet = make_snippet(row.body, query, terms)
+            hits.append({
+                "file_id": row.file_id,
+                "project_id": row.project_id,
+                "path": row.path,
+                "file_type": row.file_type,
+                "score": round(float(row_score), 4),
+                "line": line,
+                "snippet": snippet,
+            })
+        return hits
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        await db.execute(delete(ProjectFileSearch))
+        count = 0
+        async for documents in iter_file_documents(db):
+            await self.index_files(db, documents)
+            count += len(documents)
+        await db.commit()
+        return count
@@ -0,0 +1,28 @@
+"""
+Rebuild the file search index from ``project_files``.
+
+    python -m app.search.reindex
+
+Needed once after enabling the Postgres backend on an existing database;
+afterwards the index is kept current by every file write.
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal
+from app.search import InMemorySearchIndex, search_index
+
+
+async def reindex() -> int:
+    if isinstance(search_index, InMemorySearchIndex):
+        raise RuntimeError("The in-memory index is rebuilt by each API worker at startup")
+    async with AsyncSessionLocal() as db:
+        count = await search_index.rebuild(db)
+    print(f"Indexed {count} files")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    asyncio.run(reindex())
@@ -0,0 +1,33 @@
+from typing import Iterable, List
+
+from app.schemas.project import FilePatchHunk
+
+
+class PatchError(ValueError):
+    """Raised when hunks do not apply cleanly to the base content"""
+
+
+def apply_line_patch(content: str, hunks: Iterable[FilePatchHunk]) -> str:
+    """
+    Apply line-based hunks to ``content``.
+
+    Each hunk replaces ``delete`` lines starting at 0-based line ``start``
+    of the *base* content with the raw ``insert`` text. Hunks must be sorted
+    and non-overlapping. Lines keep their own terminators, so inserts carry
+    whatever line endings the client wants and the file is otherwise
+    reproduced byte for byte.
+    """
+    lines: List[str] = content.splitlines(keepends=True)
+    pieces: List[str] = []
+    cursor = 0
+    for hunk in hunks:
+        if hunk.start < cursor:
+            raise PatchError("Hunks must be sorted and must not overlap")
+        end = hunk.start + hunk.delete
+        if end > len(lines):
+            raise PatchError(f"Hunk at line {hunk.start} runs past the end of the file")
+        pieces.extend(lines[cursor:hunk.start])
+        pieces.append(hunk.insert)
+        cursor = end
+    pieces.extend(lines[cursor:])
+    return "".join(pieces)
@@ -0,0 +1,87 @@
+import base64
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from jose import jwt
+
+from app.core.config import settings
+
+
+def _b64_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class FakeGoogleCerts:
+    """
+    Local stand-in for Google's JWKS endpoint that also mints ID tokens.
+
+    Serve ``app`` in process with ``httpx.ASGITransport`` (pass it to
+    ``JWKSCache``), or run ``uvicorn app.services.google_fake:app --port 12112``
+    and set ``GOOGLE_CERTS_URL=http://localhost:12112/oauth2/v3/certs``.
+    ``rotate()`` swaps in a new signing key like Google's periodic rotation.
+    """
+
+    def __init__(self, max_age: int = 3600):
+        self.max_age = max_age
+        self.requests = 0
+        self._keys: List[Tuple[str, Any]] = []
+        self.rotate()
+        self.app = self._build_app()
+
+    def rotate(self, keep_previous: bool = True) -> str:
+        kid = uuid.uuid4().hex
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        # Google publishes the outgoing key alongside the new one for a while
+        self._keys = ([self._keys[-1]] if keep_previous and self._keys else []) + [(kid, key)]
+        return kid
+
+    def jwks(self) -> Dict[str, Any]:
+        keys = []
+        for kid, key in self._keys:
+            numbers = key.public_key().public_numbers()
+            keys.append({
+                "kty": "RSA", "alg": "RS256", "use": "sig", "kid": kid,
+                "n": _b64_uint(numbers.n), "e": _b64_uint(numbers.e),
+            })
+        return {"keys": keys}
+
+    def issue_token(self, email: str, *, audience: str = None, expires_in: int = 3600, **claims: Any) -> str:
+        kid, key = self._keys[-1]
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": audience or settings.GOOGLE_CLIENT_ID,
+            "sub": claims.pop("sub", str(abs(hash(email)))),
+            "email": email,
+            "email_verified": True,
+            "iat": now,
+            "exp": now + expires_in,
+            **claims,
+        }
+        pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        return jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid})
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Google certs")
+        fake = self
+
+        @app.get("/oauth2/v3/certs")
+        async def certs():
+            fake.requests += 1
+            return JSONResponse(
+                fake.jwks(), headers={"Cache-Control": f"public, max-age={fake.max_age}"}
+            )
+
+        return app
+
+
+fake_google_certs = FakeGoogleCerts()
+app = fake_google_certs.app
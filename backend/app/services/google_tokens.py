@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import jwk, jwt
+from jose.exceptions import JOSEError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Used when the certs response carries no max-age
+DEFAULT_MAX_AGE_SECONDS = 3600
+# Refresh this long before the keys expire
+REFRESH_MARGIN_SECONDS = 300
+# Unknown key ids trigger at most one fetch per interval
+MIN_REFRESH_INTERVAL_SECONDS = 30
+# Wait after a failed background refresh
+REFRESH_RETRY_SECONDS = 30
+# Clock skew tolerated on exp/iat/nbf
+LEEWAY_SECONDS = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleTokenError(ValueError):
+    """The ID token is malformed, expired, or not signed by Google for us"""
+
+
+def cache_lifetime(headers: httpx.Headers) -> float:
+    """Seconds the certs response stays fresh, from Cache-Control and Age"""
+    match = _MAX_AGE.search(headers.get("cache-control", ""))
+    max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+    try:
+        age = int(headers.get("age", "0"))
+    except ValueError:
+        age = 0
+    return max(max_age - age, 0)
+
+
+class JWKSCache:
+    """
+    Google's signing keys, fetched asynchronously and kept for as long as the
+    certs response's ``Cache-Control: max-age`` allows.
+
+    A background task refreshes them ahead of expiry, so verification
+    normally never waits on Google. Stale keys keep being served if a refresh
+    fails; an unknown key id (a rotation we have not seen yet) forces a
+    refetch, rate limited so forged ids cannot hammer the endpoint.
+    """
+
+    def __init__(self, url: str, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(5.0), transport=transport)
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresher: Optional[asyncio.Task] = None
+        self.fetches = 0
+        self.failures = 0
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self._keys) and time.monotonic() < self._expires_at
+
+    async def refresh(self) -> None:
+        response = await self._client.get(self.url)
+        response.raise_for_status()
+        keys = {}
+        for key in response.json().get("keys", []):
+            if key.get("kty") == "RSA" and key.get("kid"):
+                # Parse once; verification reuses the constructed key
+                keys[key["kid"]] = jwk.construct(key, algorithm=key.get("alg", "RS256"))
+        if not keys:
+            raise ValueError("Certs response contained no RSA keys")
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + cache_lifetime(response.headers)
+        self.fetches += 1
+
+    async def _refresh_once(self, *, force: bool = False, throttle: bool = False) -> None:
+        """Single-flight refresh: concurrent callers share one fetch"""
+        fetched_at = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != fetched_at:
+                return
+            if not force and self.fresh:
+                return
+            if (
+                throttle and self._fetched_at is not None
+                and time.monotonic() - self._fetched_at < MIN_REFRESH_INTERVAL_SECONDS
+            ):
+                return
+            try:
+                await self.refresh()
+            except (httpx.HTTPError, ValueError) as e:
+                self.failures += 1
+                logger.warning("Fetching Google certs failed: %s", e)
+                if not self._keys:
+                    raise GoogleTokenError("Google signing keys are unavailable") from e
+
+    async def get_key(self, kid: str) -> Any:
+        if not self._keys:
+            await self._refresh_once()
+        elif kid not in self._keys:
+            await self._refresh_once(force=True, throttle=True)
+        elif not self.fresh and (self._refresher is None or self._refresher.done()):
+            # No background task running (e.g. scripts); refresh inline
+            await self._refresh_once()
+        key = self._keys.get(kid)
+        if key is None:
+            raise GoogleTokenError("Token signed with an unknown key")
+        return key
+
+    def start(self) -> None:
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._run(), name="google-certs-refresh")
+
+    async def _run(self) -> None:
+        force = False
+        while True:
+            try:
+                await self._refresh_once(force=force)
+            except GoogleTokenError:
+                pass
+            if self.fresh:
+                await asyncio.sleep(
+                    max(self._expires_at - time.monotonic() - REFRESH_MARGIN_SECONDS, 1.0)
+                )
+                # Due for renewal while the current keys are still served
+                force = True
+            else:
+                await asyncio.sleep(REFRESH_RETRY_SECONDS)
+                force = False
+
+    async def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "fresh": self.fresh,
+            "expires_in": max(self._expires_at - time.monotonic(), 0.0) if self._keys else 0.0,
+            "fetches": self.fetches,
+            "failures": self.failures,
+        }
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens against cached JWKS keys.
+
+    Signature and claim checks are local; the RSA work runs on the
+    threadpool so a burst of sign-ins does not stall the event loop.
+    """
+
+    def __init__(self, client_id: str, keys: JWKSCache):
+        self.client_id = client_id
+        self.keys = keys
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        try:
+            header = jwt.get_unverified_header(token)
+        except JOSEError as e:
+            raise GoogleTokenError("Malformed ID token") from e
+        if header.get("alg") != "RS256":
+            raise GoogleTokenError("Unexpected ID token algorithm")
+        key = await self.keys.get_key(header.get("kid") or "")
+        try:
+            return await run_in_threadpool(
+                jwt.decode,
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                issuer=GOOGLE_ISSUERS,
+                # at_hash needs the access token, which sign-in never sends
+                options={"leeway": LEEWAY_SECONDS, "verify_at_hash": False},
+            )
+        except JOSEError as e:
+            raise GoogleTokenError(str(e)) from e
+
+
+google_certs = JWKSCache(settings.GOOGLE_CERTS_URL)
+google_token_verifier = GoogleTokenVerifier(settings.GOOGLE_CLIENT_ID, google_certs)
@@ -0,0 +1,208 @@
+import calendar
+import io
+import posixpath
+import tarfile
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import AsyncSessionLocal
+from app.crud import crud_project
+from app.models.project import ProjectFile
+
+# Rows fetched per round trip from the server-side cursor during export
+EXPORT_BATCH_SIZE = 100
+# Files written per transaction during import, cut early at the byte limit
+IMPORT_BATCH_SIZE = 200
+IMPORT_BATCH_MAX_BYTES = 8 * 1024 * 1024
+# Guards against archive bombs
+MAX_IMPORT_FILES = 10000
+MAX_IMPORT_FILE_BYTES = 5 * 1024 * 1024
+
+ARCHIVE_FORMATS = {
+    "zip": ("application/zip", "zip"),
+    "tar.gz": ("application/gzip", "tar.gz"),
+}
+
+
+class ArchiveError(ValueError):
+    """Raised when an uploaded archive cannot be imported"""
+
+
+class _StreamSink:
+    """Write-only file object whose bytes are drained after each entry"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _timestamp(file_obj: ProjectFile) -> datetime:
+    stamp = file_obj.updated_at or file_obj.created_at or datetime.utcnow()
+    return max(stamp.replace(tzinfo=None), datetime(1980, 1, 1))
+
+
+async def stream_project_archive(project_id: int, archive_format: str) -> AsyncIterator[bytes]:
+    """
+    Yield an archive of a project's files chunk by chunk.
+
+    Rows come from a server-side cursor and each file is compressed and
+    handed to the client before the next is read, so memory holds one
+    batch of rows and one file body regardless of project size. Uses its
+    own session because the response outlives the request's dependencies.
+    Paths are normalised as on import; files whose stored path would escape
+    the archive root are left out.
+    """
+    sink = _StreamSink()
+    if archive_format == "zip":
+        archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    else:
+        archive = tarfile.open(fileobj=sink, mode="w|gz")
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(ProjectFile)
+            .where(ProjectFile.project_id == project_id)
+            .order_by(ProjectFile.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for file_obj in result.scalars():
+            path = _safe_path(file_obj.path)
+            if path is None:
+                continue
+            await crud_project.load_contents([file_obj])
+            data = (file_obj.content or "").encode("utf-8")
+            stamp = _timestamp(file_obj)
+            if archive_format == "zip":
+                info = zipfile.ZipInfo(path, date_time=stamp.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(path)
+                info.size = len(data)
+                # Stamps are naive UTC; mktime would read them as local time
+                info.mtime = calendar.timegm(stamp.timetuple())
+                archive.addfile(info, io.BytesIO(data))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+    archive.close()
+    yield sink.drain()
+
+
+def _safe_path(name: str) -> Optional[str]:
+    """Normalise an archive member name; None for anything escaping the root"""
+    path = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+    if not path or path == "." or path.startswith("../") or path == "..":
+        return None
+    return path
+
+
+def _iter_members(upload: BinaryIO) -> Iterator[Tuple[str, Optional[bytes]]]:
+    """Yield (path, bytes or None if skipped) for each regular file in the archive"""
+    upload.seek(0)
+    if zipfile.is_zipfile(upload):
+        upload.seek(0)
+        with zipfile.ZipFile(upload) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                if info.file_size > MAX_IMPORT_FILE_BYTES:
+                    yield info.filename, None
+                    continue
+                yield info.filename, archive.read(info)
+        return
+
+    upload.seek(0)
+    try:
+        archive = tarfile.open(fileobj=upload, mode="r|*")
+    except tarfile.TarError:
+        raise ArchiveError("Upload is not a zip or tar archive")
+    with archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            if member.size > MAX_IMPORT_FILE_BYTES:
+                yield member.name, None
+                continue
+            yield member.name, archive.extractfile(member).read()
+
+
+def _next_batch(
+    members: Iterator[Tuple[str, Optional[bytes]]], size: int, max_bytes: int
+) -> List[Tuple[str, Optional[bytes]]]:
+    """Up to ``size`` members, ending early once they hold ``max_bytes``"""
+    batch = []
+    total = 0
+    try:
+        for member in members:
+            batch.append(member)
+            total += len(member[1] or b"")
+            if len(batch) >= size or total >= max_bytes:
+                break
+    except (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError) as e:
+        raise ArchiveError(f"Archive is corrupt: {e}")
+    return batch
+
+
+async def import_project_archive(db: AsyncSession, project_id: int, upload: BinaryIO) -> Dict[str, Any]:
+    """
+    Import a zip or tar(.gz) archive into a project, upserting by path.
+
+    Members are decompressed in the threadpool a batch at a time and each
+    batch is written with one bulk sync. A batch closes at
+    ``IMPORT_BATCH_SIZE`` files or ``IMPORT_BATCH_MAX_BYTES`` of content,
+    whichever comes first, so the few copies of it held while decoding and
+    syncing stay near that size (plus the one member that crossed it) rather
+    than growing with the archive. Batches already written stay committed if a
+    later part of the archive turns out to be corrupt.
+    """
+    summary: Dict[str, Any] = {"created": 0, "updated": 0, "unchanged": 0, "skipped": []}
+    members = _iter_members(upload)
+    seen = 0
+    while True:
+        batch = await run_in_threadpool(_next_batch, members, IMPORT_BATCH_SIZE, IMPORT_BATCH_MAX_BYTES)
+        if not batch:
+            break
+        seen += len(batch)
+        if seen > MAX_IMPORT_FILES:
+            raise ArchiveError(f"Archive contains more than {MAX_IMPORT_FILES} files")
+
+        upserts: Dict[str, Dict[str, Any]] = {}
+        for name, data in batch:
+            path = _safe_path(name)
+            if path is None or data is None:
+                summary["skipped"].append(name)
+                continue
+            try:
+                content = data.decode("utf-8")
+            except UnicodeDecodeError:
+                summary["skipped"].append(name)
+                continue
+            extension = posixpath.splitext(path)[1]
+            upserts[path] = {"path": path, "content": content, "file_type": extension or None}
+
+        if upserts:
+            results = await crud_project.bulk_sync_files(
+                db, project_id=project_id, upserts=list(upserts.values()), delete_paths=[]
+            )
+            for result in results:
+                summary[result["status"]] += 1
+    return summary
@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.stripe_event import StripeEvent
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# A claimed event is handed to another worker if not finished within this
+LEASE_SECONDS = 300
+# Exponential retry backoff: base * 2 ** (attempt - 1), capped, with jitter
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 3600.0
+# Time allowed for in-flight events on shutdown
+SHUTDOWN_GRACE_SECONDS = 10.0
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def handle_checkout_completed(db: AsyncSession, session: Dict[str, Any]) -> None:
+    """
+    Handle successful checkout completion.
+    """
+    user_id = session["metadata"]["user_id"]
+    plan_id = session["metadata"]["plan_id"]
+    
+    user = await db.get(User, int(user_id))
+    if user:
+        user.subscription_tier = plan_id
+        user.subscription_status = "active"
+        user.stripe_subscription_id = session["subscription"]
+
+
+async def handle_subscription_updated(db: AsyncSession, subscription: Dict[str, Any]) -> None:
+    """
+    Handle subscription updates.
+    """
+    result = await db.execute(
+        select(User).where(User.stripe_subscription_id == subscription["id"])
+    )
+    user = result.scalars().first()
+    if user:
+        user.subscription_status = subscription["status"]
+
+
+async def handle_subscription_deleted(db: AsyncSession, subscription: Dict[str, Any]) -> None:
+    """
+    Handle subscription cancellation.
+    """
+    result = await db.execute(
+        select(User).where(User.stripe_subscription_id == subscription["id"])
+    )
+    user = result.scalars().first()
+    if user:
+        user.subscription_tier = "free"
+        user.subscription_status = "canceled"
+        user.stripe_subscription_id = None
+
+
+# Event types we act on; anything else is recorded and marked done
+EVENT_HANDLERS: Dict[str, Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]] = {
+    "checkout.session.completed": handle_checkout_completed,
+    "customer.subscription.updated": handle_subscription_updated,
+    "customer.subscription.deleted": handle_subscription_deleted,
+}
+
+
+def ordering_key(event: Dict[str, Any]) -> str:
+    """Events sharing this key are applied strictly in creation order"""
+    obj = event["data"]["object"]
+    customer = obj.get("customer") if isinstance(obj, dict) else None
+    if isinstance(customer, dict):
+        customer = customer.get("id")
+    return customer or event["id"]
+
+
+async def record_event(db: AsyncSession, event: Dict[str, Any], payload: bytes) -> bool:
+    """
+    Insert a verified event into the inbox and commit.
+
+    Returns False if the event id is already recorded, which is how Stripe
+    redeliveries are recognised.
+    """
+    db.add(StripeEvent(
+        id=event["id"],
+        type=event["type"],
+        ordering_key=ordering_key(event),
+        stripe_created=int(event.get("created") or 0),
+        payload=payload.decode("utf-8"),
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=_utcnow(),
+    ))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+
+def retry_delay(attempts: int) -> float:
+    """Full-jitter exponential backoff for the given attempt number"""
+    ceiling = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _due_events(now: datetime, limit: int):
+    """
+    Events ready to run: pending and due, or processing with a lapsed lease,
+    and with no earlier unfinished event for the same ordering key.
+    """
+    earlier = aliased(StripeEvent)
+    blocked = exists().where(
+        earlier.ordering_key == StripeEvent.ordering_key,
+        earlier.status.in_((PENDING, PROCESSING)),
+        or_(
+            earlier.stripe_created < StripeEvent.stripe_created,
+            and_(earlier.stripe_created == StripeEvent.stripe_created, earlier.id < StripeEvent.id),
+        ),
+    )
+    return (
+        select(StripeEvent.id, StripeEvent.status, StripeEvent.locked_until)
+        .where(
+            or_(
+                and_(StripeEvent.status == PENDING, StripeEvent.next_attempt_at <= now),
+                and_(StripeEvent.status == PROCESSING, StripeEvent.locked_until <= now),
+            ),
+            ~blocked,
+        )
+        .order_by(StripeEvent.next_attempt_at, StripeEvent.stripe_created)
+        .limit(limit)
+    )
+
+
+class StripeEventWorker:
+    """
+    Applies inbox events on a bounded pool of asyncio tasks.
+
+    Events are claimed with a conditional UPDATE, so any number of API
+    processes can run a worker against the same table. A handler's changes
+    and the event's ``done`` mark commit together, so a crash mid-event
+    leaves it to be retried once its lease lapses rather than half-applied.
+    """
+
+    def __init__(self, concurrency: int, max_attempts: int, poll_seconds: float):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self._wake = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._processed = 0
+        self._retried = 0
+        self._failed = 0
+
+    def start(self) -> None:
+        if self._loop_task is None and self.concurrency > 0:
+            self._loop_task = asyncio.create_task(self._run(), name="stripe-event-worker")
+
+    async def stop(self) -> None:
+        if self._loop_task is None:
+            return
+        self._loop_task.cancel()
+        try:
+            await self._loop_task
+        except asyncio.CancelledError:
+            pass
+        self._loop_task = None
+        if self._running:
+            _, unfinished = await asyncio.wait(self._running, timeout=SHUTDOWN_GRACE_SECONDS)
+            # Cancel the stragglers and let them roll back and return their
+            # connections before the engine is disposed; their events are
+            # picked up again once the lease lapses
+            for task in unfinished:
+                task.cancel()
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Poll now instead of at the next interval"""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._dispatch_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Stripe event poll failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _dispatch_due(self) -> None:
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return
+        now = _utcnow()
+        async with AsyncSessionLocal() as db:
+            candidates = (await db.execute(_due_events(now, free))).all()
+            claimed: List[str] = []
+            for event_id, status, locked_until in candidates:
+                if await self._claim(db, event_id, status, locked_until, now):
+                    claimed.append(event_id)
+            await db.commit()
+        for event_id in claimed:
+            task = asyncio.create_task(self._process(event_id))
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        # A finished event may unblock the next one for its customer
+        self._wake.set()
+
+    async def _claim(
+        self, db: AsyncSession, event_id: str, status: str,
+        locked_until: Optional[datetime], now: datetime
+    ) -> bool:
+        lock_matches = (
+            StripeEvent.locked_until.is_(None) if locked_until is None
+            else StripeEvent.locked_until == locked_until
+        )
+        result = await db.execute(
+            update(StripeEvent)
+            .where(StripeEvent.id == event_id, StripeEvent.status == status, lock_matches)
+            .values(
+                status=PROCESSING,
+                locked_until=now + timedelta(seconds=LEASE_SECONDS),
+                attempts=StripeEvent.attempts + 1,
+            )
+        )
+        return result.rowcount == 1
+
+    async def _process(self, event_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            event = await db.get(StripeEvent, event_id)
+            if event is None or event.status != PROCESSING:
+                return
+            try:
+                handler = EVENT_HANDLERS.get(event.type)
+                if handler is not None:
+                    await handler(db, json.loads(event.payload)["data"]["object"])
+                event.status = DONE
+                event.locked_until = None
+                event.last_error = None
+                event.processed_at = _utcnow()
+                await db.commit()
+                self._processed += 1
+                return
+            except Exception as e:
+                await db.rollback()
+                error = f"{type(e).__name__}: {e}"
+
+            # Rolling back expired the instance; reload it before updating
+            await db.refresh(event)
+            attempts = event.attempts
+            if attempts >= self.max_attempts:
+                event.status = FAILED
+                event.locked_until = None
+                self._failed += 1
+                logger.error("Stripe event %s failed after %d attempts: %s", event_id, attempts, error)
+            else:
+                event.status = PENDING
+                event.locked_until = None
+                event.next_attempt_at = _utcnow() + timedelta(seconds=retry_delay(attempts))
+                self._retried += 1
+                logger.warning("Stripe event %s attempt %d failed: %s", event_id, attempts, error)
+            event.last_error = error[:2000]
+            try:
+                await db.commit()
+            except Exception:
+                # The lease will lapse and the event be retried
+                logger.exception("Could not record failure of Stripe event %s", event_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._running),
+            "processed": self._processed,
+            "retried": self._retried,
+            "failed": self._failed,
+        }
+
+
+stripe_event_worker = StripeEventWorker(
+    concurrency=settings.STRIPE_WEBHOOK_WORKERS,
+    max_attempts=settings.STRIPE_WEBHOOK_MAX_ATTEMPTS,
+    poll_seconds=settings.STRIPE_WEBHOOK_POLL_SECONDS,
+)
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+_BRACKETS = re.compile(r"\[([^\]]*)\]")
+
+
+def decode_form(pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Rebuild nested params from Stripe's bracketed form encoding"""
+    result: Dict[str, Any] = {}
+    for name, value in pairs:
+        head = name.split("[", 1)[0]
+        keys = [head] + _BRACKETS.findall(name[len(head):])
+        node = result
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+    return _listify(result)
+
+
+def _listify(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+    node = {key: _listify(value) for key, value in node.items()}
+    if node and all(key.isdigit() for key in node):
+        return [node[key] for key in sorted(node, key=int)]
+    return node
+
+
+class FakeStripe:
+    """
+    Just enough of the Stripe API for the gateway, held in memory.
+
+    Honours Idempotency-Key like Stripe does, and can inject latency and
+    failures to rehearse a brownout. Use it in process through
+    ``httpx.ASGITransport(app=fake.app)``, or run it standalone with
+    ``uvicorn app.services.stripe_fake:app --port 12111`` and set
+    ``STRIPE_API_BASE=http://localhost:12111``.
+    """
+
+    def __init__(self):
+        self.customers: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.latency = 0.0
+        self._failures: List[int] = []
+        self._idempotent: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self.app = self._build_app()
+
+    def fail_next(self, count: int = 1, status_code: int = 503) -> None:
+        self._failures.extend([status_code] * count)
+
+    def add_subscription(self, customer: str, status: str = "active") -> Dict[str, Any]:
+        subscription = {
+            "id": f"sub_{uuid.uuid4().hex[:14]}", "object": "subscription", "customer": customer,
+            "status": status, "cancel_at_period_end": False,
+        }
+        self.subscriptions[subscription["id"]] = subscription
+        return subscription
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Stripe")
+        fake = self
+
+        @app.middleware("http")
+        async def faults(request: Request, call_next):
+            fake.requests.append((request.method, request.url.path))
+            if fake.latency:
+                await asyncio.sleep(fake.latency)
+            if fake._failures:
+                return _error(fake._failures.pop(0), "api_error", "Injected failure")
+            key = request.headers.get("idempotency-key")
+            if request.method == "POST" and key and key in fake._idempotent:
+                status_code, body = fake._idempotent[key]
+                return JSONResponse(body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+            response = await call_next(request)
+            if request.method == "POST" and key and response.status_code < 500:
+                body = json.loads(b"".join([chunk async for chunk in response.body_iterator]))
+                fake._idempotent[key] = (response.status_code, body)
+                return JSONResponse(body, status_code=response.status_code)
+            return response
+
+        @app.post("/v1/customers")
+        async def create_customer(request: Request):
+            params = await _params(request)
+            customer = {
+                "id": f"cus_{uuid.uuid4().hex[:14]}", "object": "customer",
+                "email": params.get("email"), "metadata": params.get("metadata", {}),
+            }
+            fake.customers[customer["id"]] = customer
+            return customer
+
+        @app.post("/v1/checkout/sessions")
+        async def create_checkout_session(request: Request):
+            params = await _params(request)
+            if params.get("customer") not in fake.customers:
+                return _error(400, "invalid_request_error", "No such customer", code="resource_missing")
+            session_id = f"cs_test_{uuid.uuid4().hex[:24]}"
+            session = {
+                "id": session_id, "object": "checkout.session", "customer": params["customer"],
+                "mode": params.get("mode"), "metadata": params.get("metadata", {}),
+                "line_items": params.get("line_items", []),
+                "url": f"https://checkout.stripe.test/c/pay/{session_id}",
+            }
+            fake.sessions[session_id] = session
+            return session
+
+        @app.get("/v1/subscriptions/{subscription_id}")
+        async def retrieve_subscription(subscription_id: str):
+            if subscription_id not in fake.subscriptions:
+                return _error(404, "invalid_request_error", "No such subscription", code="resource_missing")
+            return fake.subscriptions[subscription_id]
+
+        @app.post("/v1/subscriptions/{subscription_id}")
+        async def update_subscription(subscription_id: str, request: Request):
+            if subscription_id not in fake.subscriptions:
+                return _error(404, "invalid_request_error", "No such subscription", code="resource_missing")
+            params = await _params(request)
+            subscription = fake.subscriptions[subscription_id]
+            if "cancel_at_period_end" in params:
+                subscription["cancel_at_period_end"] = params["cancel_at_period_end"] == "true"
+            return subscription
+
+        return app
+
+
+async def _params(request: Request) -> Dict[str, Any]:
+    form = await request.form()
+    return decode_form(list(form.multi_items()))
+
+
+def _error(status_code: int, error_type: str, message: str, code: Optional[str] = None) -> JSONResponse:
+    return JSONResponse(
+        {"error": {"type": error_type, "message": message, "code": code}}, status_code=status_code
+    )
+
+
+fake_stripe = FakeStripe()
+app = fake_stripe.app
@@ -0,0 +1,293 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import stripe_request_duration_seconds
+
+# API version the handlers and webhook payloads are written against
+STRIPE_API_VERSION = "2023-10-16"
+# Full-jitter backoff between retries: base * 2 ** attempt, capped
+RETRY_BASE_SECONDS = 0.25
+RETRY_MAX_SECONDS = 2.0
+RETRYABLE_STATUSES = (409, 429, 500, 502, 503, 504)
+
+
+class StripeGatewayError(Exception):
+    """Stripe rejected the request; ``message`` is safe to show the user"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.code = code
+
+
+class StripeUnavailable(StripeGatewayError):
+    """Stripe could not be reached in time, or the circuit breaker is open"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and fails fast
+    for ``reset_seconds``. Then one trial call is let through: success closes
+    the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(self.reset_seconds - (time.monotonic() - self._opened_at), 1.0)
+
+    def acquire(self) -> bool:
+        """Whether a call may proceed right now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """End a trial call that was abandoned without an outcome"""
+        self._trial_running = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_running or self._failures >= self.failure_threshold:
+            if self._opened_at is None or self._trial_running:
+                # Closed or half-open -> open; late failures from calls
+                # started before opening only push the reset back
+                self.opened += 1
+            self._opened_at = time.monotonic()
+        self._trial_running = False
+
+
+def encode_form(params: Dict[str, Any], prefix: str = "") -> List[Tuple[str, str]]:
+    """Flatten params into Stripe's bracketed form encoding (``a[b][0]=c``)"""
+    pairs: List[Tuple[str, str]] = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else str(key)
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            pairs.extend(encode_form(value, name))
+        elif isinstance(value, (list, tuple)):
+            pairs.extend(encode_form({str(i): item for i, item in enumerate(value)}, name))
+        elif isinstance(value, bool):
+            pairs.append((name, "true" if value else "false"))
+        else:
+            pairs.append((name, str(value)))
+    return pairs
+
+
+class StripeGateway:
+    """
+    Stripe REST calls over a pooled ``httpx.AsyncClient``.
+
+    Calls never occupy a worker thread, so a Stripe brownout costs open
+    sockets rather than the threadpool. Every attempt is bounded by the
+    client timeouts; connection errors, timeouts, 409, 429 and 5xx are
+    retried with jittered backoff under one idempotency key per call, and
+    repeated failures open the circuit breaker so callers fail fast with
+    ``StripeUnavailable``. Pass ``base_url`` (or ``transport``) to point the
+    gateway at the fake in ``app.services.stripe_fake``.
+    """
+
+    def __init__(
+        self, api_key: str, *, base_url: str = "https://api.stripe.com",
+        timeout: float = 10.0, connect_timeout: float = 3.0, max_retries: int = 2,
+        max_connections: int = 20, breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_seconds=30.0)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout, pool=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Authorization": f"Bearer {api_key}", "Stripe-Version": STRIPE_API_VERSION},
+            transport=transport,
+        )
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._rejected = 0
+
+    async def request(
+        self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None, operation: str = "other",
+    ) -> Dict[str, Any]:
+        headers = {}
+        if method == "POST":
+            # Makes retrying a POST safe, even one Stripe already applied
+            headers["Idempotency-Key"] = idempotency_key or str(uuid.uuid4())
+        encoded = encode_form(params or {})
+
+        attempt = 0
+        while True:
+            # No await before acquire(), so this is the state it decides on
+            trial = self.breaker.state == "half_open"
+            if not self.breaker.acquire():
+                self._rejected += 1
+                raise StripeUnavailable(
+                    "Payment provider is temporarily unavailable", retry_after=self.breaker.retry_after()
+                )
+            self._requests += 1
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                if method == "GET":
+                    response = await self._client.request(method, path, params=encoded, headers=headers)
+                else:
+                    response = await self._client.request(method, path, data=dict(encoded), headers=headers)
+            except httpx.TransportError as e:
+                failure = f"{type(e).__name__}"
+                response = None
+                stripe_request_duration_seconds.observe(time.perf_counter() - start, operation, "error")
+            except asyncio.CancelledError:
+                # Says nothing about Stripe, but must not leave the trial slot taken
+                if trial:
+                    self.breaker.release()
+                raise
+            except BaseException:
+                self.breaker.record_failure()
+                raise
+            else:
+                stripe_request_duration_seconds.observe(
+                    time.perf_counter() - start, operation, str(response.status_code)
+                )
+                if response.status_code < 400 or not self._should_retry(response):
+                    self.breaker.record_success()
+                    return self._parse(response)
+                failure = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("retry-after")
+
+            if response is None or response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                # Rate limits and lock conflicts mean Stripe is up
+                self.breaker.record_success()
+            if attempt >= self.max_retries:
+                self._failures += 1
+                if response is not None and response.status_code < 500:
+                    return self._parse(response)
+                raise StripeUnavailable(f"Payment provider request failed ({failure})")
+            attempt += 1
+            self._retries += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    @staticmethod
+    def _should_retry(response: httpx.Response) -> bool:
+        should_retry = response.headers.get("stripe-should-retry")
+        if should_retry is not None:
+            return should_retry == "true"
+        return response.status_code in RETRYABLE_STATUSES
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        ceiling = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(float(retry_after), RETRY_MAX_SECONDS))
+            except ValueError:
+                pass
+        return delay
+
+    @staticmethod
+    def _parse(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code >= 400:
+            error = body.get("error") or {}
+            raise StripeGatewayError(
+                error.get("message") or f"Stripe request failed with status {response.status_code}",
+                status_code=response.status_code,
+                code=error.get("code"),
+            )
+        return body
+
+    async def create_customer(
+        self, *, email: str, metadata: Dict[str, Any], idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "POST", "/v1/customers", {"email": email, "metadata": metadata}, idempotency_key,
+            operation="customers.create",
+        )
+
+    async def create_checkout_session(
+        self, *, idempotency_key: Optional[str] = None, **params: Any
+    ) -> Dict[str, Any]:
+        return await self.request(
+            "POST", "/v1/checkout/sessions", params, idempotency_key, operation="checkout.sessions.create"
+        )
+
+    async def retrieve_subscription(self, subscription_id: str) -> Dict[str, Any]:
+        return await self.request(
+            "GET", f"/v1/subscriptions/{subscription_id}", operation="subscriptions.retrieve"
+        )
+
+    async def update_subscription(self, subscription_id: str, **params: Any) -> Dict[str, Any]:
+        return await self.request(
+            "POST", f"/v1/subscriptions/{subscription_id}", params, operation="subscriptions.update"
+        )
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self._requests,
+            "retries": self._retries,
+            "failures": self._failures,
+            "rejected": self._rejected,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+        }
+
+
+stripe_gateway = StripeGateway(
+    settings.STRIPE_SECRET_KEY,
+    base_url=settings.STRIPE_API_BASE,
+    timeout=settings.STRIPE_TIMEOUT_SECONDS,
+    connect_timeout=settings.STRIPE_CONNECT_TIMEOUT_SECONDS,
+    max_retries=settings.STRIPE_MAX_RETRIES,
+    max_connections=settings.STRIPE_MAX_CONNECTIONS,
+    breaker=CircuitBreaker(
+        failure_threshold=settings.STRIPE_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=settings.STRIPE_CIRCUIT_RESET_SECONDS,
+    ),
+)
@@ -0,0 +1,39 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.storage.base import BlobNotFound, BlobStore, BlobStoreNotConfigured, content_digest
+from app.storage.local import LocalBlobStore
+from app.storage.s3 import S3BlobStore
+
+
+def create_blob_store() -> Optional[BlobStore]:
+    """Build the configured backend; ``None`` keeps file bodies inline in Postgres"""
+    backend = settings.BLOB_STORAGE_BACKEND
+    if backend == "database":
+        return None
+    if backend == "local":
+        return LocalBlobStore(settings.BLOB_STORAGE_PATH)
+    if backend == "s3":
+        return S3BlobStore(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            prefix=settings.S3_PREFIX,
+        )
+    raise ValueError(f"Unknown BLOB_STORAGE_BACKEND '{backend}'")
+
+
+blob_store = create_blob_store()
+
+__all__ = [
+    "BlobNotFound",
+    "BlobStore",
+    "BlobStoreNotConfigured",
+    "LocalBlobStore",
+    "S3BlobStore",
+    "blob_store",
+    "content_digest",
+    "create_blob_store",
+]
@@ -0,0 +1,42 @@
+import hashlib
+
+
+class BlobNotFound(Exception):
+    """Raised when a content hash has no stored blob"""
+
+
+class BlobStoreNotConfigured(Exception):
+    """Raised when a body kept only as a content hash is read without a blob store"""
+
+    def __init__(self, digest: str):
+        super().__init__(
+            f"Content {digest} was moved to blob storage but BLOB_STORAGE_BACKEND is 'database'"
+        )
+
+
+def content_digest(data: bytes) -> str:
+    """Hex SHA-256 used as the address of a blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed storage for file bodies.
+
+    Blobs are immutable and keyed by the SHA-256 of their bytes, so writing
+    the same content twice stores it once no matter how many files,
+    projects or users reference it.
+    """
+
+    async def put(self, data: bytes) -> str:
+        """Store ``data`` if it is not already present and return its digest"""
+        raise NotImplementedError
+
+    async def get(self, digest: str) -> bytes:
+        raise NotImplementedError
+
+    async def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+from starlette.concurrency import run_in_threadpool
+
+from app.storage.base import BlobNotFound, BlobStore, content_digest
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs on the local filesystem, sharded as ``root/ab/cd/<digest>``.
+
+    Writes go to a temporary file and are renamed into place, so readers
+    never observe a partially written blob.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _read(self, digest: str) -> bytes:
+        try:
+            with open(self._path(digest), "rb") as blob:
+                return blob.read()
+        except FileNotFoundError:
+            raise BlobNotFound(digest)
+
+    async def put(self, data: bytes) -> str:
+        digest = content_digest(data)
+        await run_in_threadpool(self._write, digest, data)
+        return digest
+
+    async def get(self, digest: str) -> bytes:
+        return await run_in_threadpool(self._read, digest)
+
+    async def exists(self, digest: str) -> bool:
+        return await run_in_threadpool(os.path.exists, self._path(digest))
@@ -0,0 +1,63 @@
+"""
+Move file bodies still stored inline in ``project_files.content`` into the
+configured blob store.
+
+    python -m app.storage.migrate [--batch-size 200]
+
+Safe to re-run and to run while the API is serving: each row is only
+rewritten if its inline content is unchanged since it was read.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.models.project import ProjectFile
+from app.storage import blob_store
+
+
+async def migrate_inline_content(batch_size: int = 200) -> int:
+    if blob_store is None:
+        raise RuntimeError("BLOB_STORAGE_BACKEND is 'database'; there is no blob store to migrate to")
+
+    moved = 0
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(ProjectFile.id, ProjectFile.inline_content)
+                .where(ProjectFile.inline_content.is_not(None), ProjectFile.id > last_id)
+                .order_by(ProjectFile.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            for file_id, text in rows:
+                data = text.encode("utf-8")
+                digest = await blob_store.put(data)
+                updated = await db.execute(
+                    update(ProjectFile)
+                    .where(ProjectFile.id == file_id, ProjectFile.inline_content == text)
+                    .values({
+                        ProjectFile.inline_content: None,
+                        ProjectFile.content_hash: digest,
+                        ProjectFile.size: len(data),
+                    })
+                )
+                # Zero when the file was edited since the select; it stays inline
+                moved += updated.rowcount
+            await db.commit()
+            last_id = rows[-1][0]
+            print(f"Moved {moved} files to blob storage")
+    await blob_store.close()
+    return moved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(migrate_inline_content(args.batch_size))
@@ -0,0 +1,123 @@
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from app.storage.base import BlobNotFound, BlobStore, content_digest
+
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs in an S3-compatible bucket using path-style requests.
+
+    Requests are signed with AWS Signature V4 directly over httpx, so any
+    S3 API (AWS, MinIO, LocalStack, R2) works by pointing ``endpoint_url``
+    at it, and no extra SDK is needed. ``app.storage.s3_fake`` checks the
+    signatures locally; pass its ``transport`` to use it in process.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key_id: str,
+        secret_access_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.prefix = prefix
+        self._host = urlsplit(self.endpoint_url).netloc
+        self._client = httpx.AsyncClient(timeout=timeout, transport=transport)
+
+    def _key_path(self, digest: str) -> str:
+        key = f"{self.prefix}{digest[:2]}/{digest}"
+        return quote(f"/{self.bucket}/{key}")
+
+    def _signed_headers(self, method: str, path: str, payload_hash: str) -> Dict[str, str]:
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = now.strftime("%Y%m%d")
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        signed_header_names = "host;x-amz-content-sha256;x-amz-date"
+        canonical_request = "\n".join([
+            method,
+            path,
+            "",
+            f"host:{self._host}",
+            f"x-amz-content-sha256:{payload_hash}",
+            f"x-amz-date:{amz_date}",
+            "",
+            signed_header_names,
+            payload_hash,
+        ])
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        signing_key = _hmac(
+            _hmac(
+                _hmac(_hmac(f"AWS4{self.secret_access_key}".encode(), datestamp), self.region),
+                "s3",
+            ),
+            "aws4_request",
+        )
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return {
+            "x-amz-content-sha256": payload_hash,
+            "x-amz-date": amz_date,
+            "Authorization": (
+                f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+                f"SignedHeaders={signed_header_names}, Signature={signature}"
+            ),
+        }
+
+    async def _request(self, method: str, digest: str, data: Optional[bytes] = None) -> httpx.Response:
+        path = self._key_path(digest)
+        payload_hash = digest if data is not None else EMPTY_PAYLOAD_HASH
+        headers = self._signed_headers(method, path, payload_hash)
+        return await self._client.request(
+            method, f"{self.endpoint_url}{path}", headers=headers, content=data
+        )
+
+    async def put(self, data: bytes) -> str:
+        digest = content_digest(data)
+        if await self.exists(digest):
+            return digest
+        response = await self._request("PUT", digest, data)
+        response.raise_for_status()
+        return digest
+
+    async def get(self, digest: str) -> bytes:
+        response = await self._request("GET", digest)
+        if response.status_code == 404:
+            raise BlobNotFound(digest)
+        response.raise_for_status()
+        return response.content
+
+    async def exists(self, digest: str) -> bool:
+        response = await self._request("HEAD", digest)
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    async def close(self) -> None:
+        await self._client.aclose()
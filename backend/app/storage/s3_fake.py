@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import FastAPI, Request, Response
+
+_AUTHORIZATION = re.compile(
+    r"AWS4-HMAC-SHA256 Credential=([^/]+)/(\d{8})/([^/]+)/([^/]+)/aws4_request, "
+    r"SignedHeaders=([a-z0-9;-]+), Signature=([0-9a-f]{64})"
+)
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+# S3 rejects requests dated further than this from its own clock
+MAX_CLOCK_SKEW = timedelta(minutes=15)
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+def _error(status_code: int, code: str, message: str, method: str = "GET") -> Response:
+    # HEAD responses carry no body, so S3 only sends the status
+    body = "" if method == "HEAD" else (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f"<Error><Code>{code}</Code><Message>{message}</Message></Error>"
+    )
+    return Response(body, status_code=status_code, media_type="application/xml")
+
+
+class FakeS3:
+    """
+    In-memory S3 buckets that check AWS Signature V4 on every request.
+
+    Covers what ``S3BlobStore`` uses: path-style PUT, GET and HEAD of
+    objects. The signature is recomputed here from the request as received,
+    independently of the client, and a wrong key, scope, date, payload hash
+    or signature gets S3's error code. Use it in process through
+    ``httpx.ASGITransport(app=fake.app)`` passed as ``S3BlobStore(transport=...)``,
+    or run ``uvicorn app.storage.s3_fake:app --port 12113`` and set
+    ``S3_ENDPOINT_URL=http://localhost:12113`` with the default bucket and keys.
+    """
+
+    def __init__(
+        self,
+        access_key_id: str = "fake-access-key",
+        secret_access_key: str = "fake-secret-key",
+        region: str = "us-east-1",
+        buckets: Iterable[str] = ("fluxa-blobs",),
+    ):
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+        self.buckets = set(buckets)
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.rejected = 0
+        self.app = self._build_app()
+
+    def _signature(self, datestamp: str, string_to_sign: str) -> str:
+        key = _hmac(f"AWS4{self.secret_access_key}".encode(), datestamp)
+        key = _hmac(_hmac(_hmac(key, self.region), "s3"), "aws4_request")
+        return hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    def verify(self, request: Request, body: bytes) -> Optional[Response]:
+        """None if the request is correctly signed, else the error S3 would send"""
+        method = request.method
+        match = _AUTHORIZATION.fullmatch(request.headers.get("authorization", ""))
+        if match is None:
+            return _error(403, "AccessDenied", "Missing or malformed Authorization header", method)
+        access_key_id, datestamp, region, service, signed_headers, signature = match.groups()
+        if access_key_id != self.access_key_id:
+            return _error(403, "InvalidAccessKeyId", "Unknown access key", method)
+        if region != self.region or service != "s3":
+            return _error(400, "AuthorizationHeaderMalformed", f"Expected region {self.region}", method)
+
+        amz_date = request.headers.get("x-amz-date", "")
+        try:
+            signed_at = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        except ValueError:
+            return _error(403, "AccessDenied", "Missing or malformed X-Amz-Date", method)
+        if not amz_date.startswith(datestamp):
+            return _error(403, "SignatureDoesNotMatch", "Credential date differs from X-Amz-Date", method)
+        if abs(datetime.now(timezone.utc) - signed_at) > MAX_CLOCK_SKEW:
+            return _error(403, "RequestTimeTooSkewed", "Request time is too far from the server time", method)
+
+        payload_hash = request.headers.get("x-amz-content-sha256")
+        if payload_hash is None:
+            return _error(400, "InvalidRequest", "Missing x-amz-content-sha256", method)
+        if payload_hash != UNSIGNED_PAYLOAD and hashlib.sha256(body).hexdigest() != payload_hash:
+            return _error(400, "XAmzContentSHA256Mismatch", "Body does not match x-amz-content-sha256", method)
+
+        names = signed_headers.split(";")
+        if "host" not in names or "x-amz-date" not in names:
+            return _error(403, "AccessDenied", "Host and X-Amz-Date must be signed", method)
+        canonical_headers = "".join(
+            f"{name}:{' '.join(request.headers.get(name, '').split())}\n" for name in names
+        )
+        query = request.scope.get("query_string", b"").decode()
+        canonical_query = "&".join(sorted(
+            part if "=" in part else f"{part}=" for part in query.split("&") if part
+        ))
+        canonical_request = "\n".join([
+            method,
+            request.scope.get("raw_path", request.url.path.encode()).decode(),
+            canonical_query,
+            canonical_headers,
+            signed_headers,
+            payload_hash,
+        ])
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            f"{datestamp}/{region}/s3/aws4_request",
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        if not hmac.compare_digest(self._signature(datestamp, string_to_sign), signature):
+            return _error(403, "SignatureDoesNotMatch", "The request signature does not match", method)
+        return None
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake S3")
+        fake = self
+
+        @app.api_route("/{bucket}/{key:path}", methods=["GET", "HEAD", "PUT"])
+        async def object_request(bucket: str, key: str, request: Request):
+            fake.requests.append((request.method, f"/{bucket}/{key}"))
+            body = await request.body()
+            error = fake.verify(request, body)
+            if error is not None:
+                fake.rejected += 1
+                return error
+            if bucket not in fake.buckets:
+                return _error(404, "NoSuchBucket", "The specified bucket does not exist", request.method)
+
+            if request.method == "PUT":
+                fake.objects[(bucket, key)] = body
+                return Response(headers={"ETag": f'"{hashlib.md5(body).hexdigest()}"'})
+            data = fake.objects.get((bucket, key))
+            if data is None:
+                return _error(404, "NoSuchKey", "The specified key does not exist", request.method)
+            if request.method == "HEAD":
+                return Response(headers={"Content-Length": str(len(data))})
+            return Response(data, media_type="application/octet-stream")
+
+        return app
+
+
+fake_s3 = FakeS3()
+app = fake_s3.app
@@ -0,0 +1,393 @@
+"""
+Drive the API's hot paths in process and report throughput and latency.
+
+    python -m benchmarks.load [--users 20] [--projects 5] [--files 50]
+                              [--concurrency 16] [--duration 5]
+                              [--database-url sqlite:////tmp/fluxa-bench.db]
+                              [--output results.json] [--compare previous.json]
+
+Run from ``backend/`` with the usual settings in the environment or .env.
+The app is served through httpx's ASGI transport inside its own lifespan,
+so the numbers include routing, middleware, serialization and the database
+but no sockets. Without ``--database-url`` a fresh SQLite file is used; a
+Postgres URL is seeded alongside whatever it already holds. Either is
+migrated to the latest schema first, and rate limiting is switched off for
+the run.
+
+Seeding inserts ``--users`` users sharing one password hash, then creates
+``--projects`` projects of ``--files`` files each through the API, with
+file sizes drawn from a log-normal around ``--file-size`` bytes. Each
+scenario then runs for ``--duration`` seconds at ``--concurrency``
+in-flight requests. Results are written as JSON (by default to
+``benchmarks/results/<commit>.json``) so runs can be compared between
+commits with ``--compare``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "bench-password"
+# Clamp generated file sizes to this range (bytes)
+MIN_FILE_SIZE = 64
+MAX_FILE_SIZE = 256 * 1024
+# Files sent per bulk sync request while seeding
+SEED_BATCH_SIZE = 500
+WARMUP_REQUESTS = 20
+PERCENTILES = (50, 95, 99)
+
+CODE_LINES = [
+    "import os",
+    "from typing import Any, Dict, List, Optional",
+    "def handler(event: Dict[str, Any]) -> Optional[str]:",
+    "    value = event.get('value')",
+    "    if value is None:",
+    "        return None",
+    "    return str(value).strip()",
+    "class Repository:",
+    "    def __init__(self, session):",
+    "        self.session = session",
+    "    # Look the record up by primary key before touching it",
+    "    for item in items:",
+    "        results.append(transform(item))",
+    "const response = await fetch(`/api/v1/projects/${id}`);",
+    "export default function App() { return null; }",
+    "",
+]
+
+
+def make_content(rng: random.Random, size: int) -> str:
+    lines, length = [], 0
+    while length < size:
+        line = rng.choice(CODE_LINES)
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def file_size(rng: random.Random, median: int) -> int:
+    # Source trees are mostly small files with a long tail of large ones
+    size = int(rng.lognormvariate(math.log(median), 1.0))
+    return max(MIN_FILE_SIZE, min(MAX_FILE_SIZE, size))
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Context:
+    """Seeded state shared by the scenarios"""
+
+    def __init__(self, rng: random.Random, run_id: str, file_size: int):
+        self.rng = rng
+        self.run_id = run_id
+        self.file_size = file_size
+        self.emails: List[str] = []
+        self.tokens: List[str] = []
+        # (token, project_id) and (token, project_id, file_id) owned by that token's user
+        self.projects: List[tuple] = []
+        self.files: List[tuple] = []
+        self.counter = 0
+
+    def next_id(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    def auth(self, token: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {token}"}
+
+
+def check(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url.path}: "
+                           f"{response.status_code} {response.text[:200]}")
+    return response
+
+
+async def seed(client: httpx.AsyncClient, args: argparse.Namespace, run_id: str) -> Context:
+    from app.core.database import AsyncSessionLocal
+    from app.core.hashing import password_hasher
+    from app.models.user import User
+
+    ctx = Context(random.Random(args.seed), run_id, args.file_size)
+    # One bcrypt hash for everyone; hashing per user would dominate seeding
+    hashed_password = await password_hasher.hash(PASSWORD)
+    ctx.emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.users)]
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            User(email=email, hashed_password=hashed_password, first_name="Bench",
+                 last_name=str(i), oauth_provider="local", is_active=True)
+            for i, email in enumerate(ctx.emails)
+        ])
+        await db.commit()
+
+    for email in ctx.emails:
+        response = check(await client.post(f"{API}/auth/login", json={"email": email, "password": PASSWORD}))
+        ctx.tokens.append(response.json()["token"]["access_token"])
+
+    for user_index, token in enumerate(ctx.tokens):
+        for project_index in range(args.projects):
+            response = check(await client.post(
+                f"{API}/projects/", headers=ctx.auth(token),
+                json={"name": f"project-{user_index}-{project_index}", "language": "python"},
+            ))
+            project_id = response.json()["id"]
+            ctx.projects.append((token, project_id))
+            upserts = [
+                {"path": f"src/module_{n}.py", "content": make_content(ctx.rng, file_size(ctx.rng, args.file_size))}
+                for n in range(args.files)
+            ]
+            for start in range(0, len(upserts), SEED_BATCH_SIZE):
+                response = check(await client.post(
+                    f"{API}/projects/{project_id}/files/bulk", headers=ctx.auth(token),
+                    json={"upserts": upserts[start:start + SEED_BATCH_SIZE]},
+                ))
+                ctx.files.extend((token, project_id, item["id"]) for item in response.json()["results"])
+    return ctx
+
+
+def webhook_request(event: Dict[str, Any]) -> Dict[str, Any]:
+    import stripe
+    from app.core.config import settings
+
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = stripe.WebhookSignature._compute_signature(
+        f"{timestamp}.{payload}", settings.STRIPE_WEBHOOK_SECRET
+    )
+    return {
+        "content": payload,
+        "headers": {"Stripe-Signature": f"t={timestamp},v1={signature}", "Content-Type": "application/json"},
+    }
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    email = ctx.rng.choice(ctx.emails)
+    return await client.post(f"{API}/auth/login", json={"email": email, "password": PASSWORD})
+
+
+async def auth_me(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get(f"{API}/auth/me", headers=ctx.auth(ctx.rng.choice(ctx.tokens)))
+
+
+async def read_projects(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.get(f"{API}/projects/", headers=ctx.auth(ctx.rng.choice(ctx.tokens)))
+
+
+async def read_project(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    token, project_id = ctx.rng.choice(ctx.projects)
+    return await client.get(f"{API}/projects/{project_id}", headers=ctx.auth(token))
+
+
+async def create_file(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    token, project_id = ctx.rng.choice(ctx.projects)
+    path = f"bench/new_{ctx.next_id()}.py"
+    return await client.post(
+        f"{API}/projects/{project_id}/files", headers=ctx.auth(token),
+        json={"name": path.rsplit("/", 1)[-1], "path": path, "project_id": project_id,
+              "content": make_content(ctx.rng, file_size(ctx.rng, ctx.file_size))},
+    )
+
+
+async def update_file(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    token, project_id, file_id = ctx.rng.choice(ctx.files)
+    return await client.put(
+        f"{API}/projects/{project_id}/files/{file_id}", headers=ctx.auth(token),
+        json={"content": make_content(ctx.rng, file_size(ctx.rng, ctx.file_size))},
+    )
+
+
+async def webhook_ingest(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    event_number = ctx.next_id()
+    event = {
+        "id": f"evt_bench_{ctx.run_id}_{event_number}",
+        "type": "customer.subscription.updated",
+        "created": int(time.time()),
+        "data": {"object": {"id": f"sub_bench_{event_number % 50}", "status": "active"}},
+    }
+    return await client.post(f"{API}/payments/webhook", **webhook_request(event))
+
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]] = {
+    "login": login,
+    "auth_me": auth_me,
+    "read_projects": read_projects,
+    "read_project": read_project,
+    "create_file": create_file,
+    "update_file": update_file,
+    "webhook_ingest": webhook_ingest,
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, ctx: Context, scenario: Callable, concurrency: int, duration: float
+) -> Dict[str, Any]:
+    for _ in range(WARMUP_REQUESTS):
+        await scenario(client, ctx)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = exceptions = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        nonlocal errors, exceptions
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await scenario(client, ctx)
+            except Exception as e:
+                errors += 1
+                exceptions += 1
+                statuses[type(e).__name__] = statuses.get(type(e).__name__, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies) + exceptions,
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            **{f"p{pct}": round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    header = f"{'scenario':16} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    if baseline is not None:
+        header += f" {'req/s vs base':>14} {'p99 vs base':>12}"
+    print(header)
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        line = (f"{name:16} {result['throughput_rps']:9.1f} {latency['p50']:9.2f} "
+                f"{latency['p95']:9.2f} {latency['p99']:9.2f} {result['errors']:7d}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous and previous["throughput_rps"] and previous["latency_ms"]["p99"]:
+            throughput = result["throughput_rps"] / previous["throughput_rps"] - 1
+            p99 = latency["p99"] / previous["latency_ms"]["p99"] - 1
+            line += f" {throughput:+13.1%} {p99:+12.1%}"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.core.database import async_engine
+    from main import app
+
+    run_id = f"{int(time.time())}{random.randrange(1000):03d}"
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            seed_started = time.perf_counter()
+            ctx = await seed(client, args, run_id)
+            seed_seconds = time.perf_counter() - seed_started
+            print(f"seeded {len(ctx.tokens)} users, {len(ctx.projects)} projects, "
+                  f"{len(ctx.files)} files in {seed_seconds:.1f}s")
+
+            scenarios = {}
+            for name in args.scenarios:
+                scenarios[name] = await run_scenario(
+                    client, ctx, SCENARIOS[name], args.concurrency, args.duration
+                )
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": async_engine.dialect.name,
+        "settings": {
+            "db_pool_size": settings.DB_POOL_SIZE,
+            "db_max_overflow": settings.DB_MAX_OVERFLOW,
+            "search_backend": settings.SEARCH_BACKEND,
+            "blob_storage_backend": settings.BLOB_STORAGE_BACKEND,
+        },
+        "parameters": {
+            "users": args.users,
+            "projects_per_user": args.projects,
+            "files_per_project": args.files,
+            "file_size": args.file_size,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "seed": args.seed,
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "scenarios": scenarios,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--projects", type=int, default=5, help="projects per user")
+    parser.add_argument("--files", type=int, default=50, help="files per project")
+    parser.add_argument("--file-size", type=int, default=4096, help="median file size in bytes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    # Settings are read at import, so these must be in place before the app loads
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.gettempdir(), "fluxa-bench.db")
+        if os.path.exists(path):
+            os.remove(path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+    from app.manage import migrate
+    migrate()
+    results = asyncio.run(main(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join("benchmarks", "results", f"{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {output}")
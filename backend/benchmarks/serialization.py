@@ -0,0 +1,101 @@
+"""
+Compare FastAPI's response_model serialization with ``model_response``.
+
+    python -m benchmarks.serialization [--iterations 200]
+
+Run from ``backend/`` with the usual settings in the environment or .env.
+Both paths start from the same in-memory ORM objects, so the numbers are
+pure validation + encoding cost with no database or network involved.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import model_response
+from app.models.project import Project, ProjectFile
+from app.models.user import User
+from app.schemas.project import Project as ProjectSchema, ProjectWithFiles
+from app.schemas.user import User as UserSchema
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_users(count: int) -> List[User]:
+    return [
+        User(id=i, email=f"user{i}@example.com", first_name="Ada", last_name="Lovelace",
+             is_active=True, is_superuser=False, email_verified=True, subscription_tier="free",
+             subscription_status="active",
+             created_at=NOW, updated_at=NOW)
+        for i in range(count)
+    ]
+
+
+def make_projects(count: int) -> List[Project]:
+    return [
+        Project(id=i, name=f"project-{i}", description="A project " * 10, owner_id=1,
+                is_public=False, language="python", framework="fastapi", created_at=NOW)
+        for i in range(count)
+    ]
+
+
+def make_project_with_files(files: int, file_size: int) -> Project:
+    project = make_projects(1)[0]
+    body = ("print('hello, world')\n" * (file_size // 22 + 1))[:file_size]
+    project.files = [
+        ProjectFile(id=i, project_id=project.id, name=f"f{i}.py", path=f"src/f{i}.py",
+                    inline_content=body, file_type=".py", size=file_size,
+                    content_hash="0" * 64, created_at=NOW)
+        for i in range(files)
+    ]
+    return project
+
+
+async def fastapi_path(schema: Any, obj: Any) -> bytes:
+    field = create_response_field(name="Response", type_=schema, mode="serialization")
+    content = await serialize_response(field=field, response_content=obj)
+    return JSONResponse(content).body
+
+
+async def fast_path(schema: Any, obj: Any) -> bytes:
+    return model_response(schema, obj).body
+
+
+async def measure(run: Callable, schema: Any, obj: Any, iterations: int) -> List[float]:
+    await run(schema, obj)  # warm up adapters and caches
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await run(schema, obj)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(iterations: int) -> None:
+    cases = [
+        ("read_users (100 users)", List[UserSchema], make_users(100)),
+        ("read_projects (100 projects)", List[ProjectSchema], make_projects(100)),
+        ("read_project (200 files x 4 KiB)", ProjectWithFiles, make_project_with_files(200, 4096)),
+    ]
+    print(f"{'case':36} {'fastapi p50 ms':>15} {'fast p50 ms':>12} {'speedup':>8}")
+    for label, schema, obj in cases:
+        baseline = await fastapi_path(schema, obj)
+        candidate = await fast_path(schema, obj)
+        assert json.loads(baseline) == json.loads(candidate), f"{label}: outputs differ"
+        before = statistics.median(await measure(fastapi_path, schema, obj, iterations))
+        after = statistics.median(await measure(fast_path, schema, obj, iterations))
+        print(f"{label:36} {before:15.3f} {after:12.3f} {before / after:7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
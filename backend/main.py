@@ -1,22 +1,45 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import time
 import uvicorn
 
+from app.core.compression import CompressionMiddleware, response_codecs, split_setting
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.idempotency import IdempotencyMiddleware, idempotency_store
+from app.core.metrics import MetricsMiddleware, startup_seconds
+from app.core.query_tracking import QueryTrackingMiddleware
+from app.core.database import async_engine
 from app.api.v1.api import api_router
-from app.core.security import create_first_superuser
+from app.api.health import readiness_probe, router as health_router
+from app.api.metrics import router as metrics_router
+from app.core.hashing import password_hasher, PasswordHasherOverloaded
+from app.search import search_index
+from app.services.google_tokens import google_certs
+from app.services.stripe_events import stripe_event_worker
+from app.services.stripe_gateway import stripe_gateway
+from app.storage import blob_store
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    Base.metadata.create_all(bind=engine)
-    await create_first_superuser()
+    # Startup - schema and superuser come from `python -m app.manage bootstrap`
+    started = time.perf_counter()
+    await search_index.startup()
+    google_certs.start()
+    stripe_event_worker.start()
+    startup_seconds.set(value=time.perf_counter() - started)
     yield
-    # Shutdown
-    pass
+    # Shutdown - fail readiness first so the load balancer drains this worker
+    readiness_probe.draining = True
+    await stripe_event_worker.stop()
+    await stripe_gateway.close()
+    await google_certs.close()
+    password_hasher.shutdown()
+    if blob_store is not None:
+        await blob_store.close()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -27,6 +50,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Idempotency-Key replay - innermost, so replays still get CORS and compression
+app.add_middleware(IdempotencyMiddleware, store=idempotency_store)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,10 +60,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor", "Link", "ETag", "Last-Modified", "Idempotent-Replayed",
+        "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy", "Retry-After",
+    ],
 )
 
+# Response compression - added last so it wraps every other layer
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        codecs=response_codecs,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        content_types=split_setting(settings.COMPRESSION_CONTENT_TYPES),
+    )
+
+# Request metrics - wraps every layer below, so latency includes them all
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# SQL statement tracking per request - wraps metrics, which reads its counts
+app.add_middleware(QueryTrackingMiddleware)
+
+
+@app.exception_handler(PasswordHasherOverloaded)
+async def password_hasher_overloaded_handler(request: Request, exc: PasswordHasherOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(health_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -45,11 +104,6 @@ async def root():
     return {"message": "Welcome to Fluxa API", "version": "1.0.0"}
 
 
-@app.get("/health")
-async def health_check():
-    return {"status": "healthy"}
-
-
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",